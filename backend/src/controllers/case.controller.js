@@ -141,6 +141,23 @@ export const caseRegister = async (req, res) => {
     }
 };
 
+const SIMILAR_CASE_PROJECTION = ["caseTitle", "bnsSections", "bailStatus", "courtName", "summaryExcerpt"];
+
+// the ML service describes each similar case from its index; only cases it could not describe
+// (older service, case removed meanwhile) are read from the database
+const enrichSimilarCases = async (similarCaseLists) => {
+  const missingIds = [...new Set(similarCaseLists.flat()
+    .filter(sc => sc.caseId && sc.caseTitle === undefined)
+    .map(sc => sc.caseId))];
+  const details = missingIds.length ? await Case.find({ caseId: { $in: missingIds } }).lean() : [];
+  const detailsById = new Map(details.map(cd => [cd.caseId, cd]));
+
+  return similarCaseLists.map(similarCases => similarCases.map(sc => {
+    const found = detailsById.get(sc.caseId);
+    return found ? { similarityPercentage: sc.similarityPercentage, ...found } : { ...sc };
+  }));
+};
+
 export const getCaseProcessed = async (req, res) => {
   try {
     const { entity, caseid } = req.params;
@@ -163,7 +180,7 @@ export const getCaseProcessed = async (req, res) => {
     };
 
 
-    const response = await axiosInstance.post('/find-similar-cases', payload);
+    const response = await axiosInstance.post('/find-similar-cases', { ...payload, projection: SIMILAR_CASE_PROJECTION });
 
 
     const aiAssistance = response?.data?.aiAssistance ?? null;
@@ -171,17 +188,7 @@ export const getCaseProcessed = async (req, res) => {
     const similarCases = Array.isArray(response?.data?.similarCases) ? response.data.similarCases : [];
 
 
-    let enrichedSimilarCases = [];
-    if (similarCases.length) {
-      const similarCaseIds = similarCases.map(c => c.caseId).filter(Boolean);
-      const similarCaseDetails = await Case.find({ caseId: { $in: similarCaseIds } });
-      enrichedSimilarCases = similarCases.map(sc => {
-        const details = similarCaseDetails.find(cd => cd.caseId === sc.caseId);
-        return details
-          ? { similarityPercentage: sc.similarityPercentage, ...details.toObject() }
-          : { ...sc };
-      });
-    }
+    const [enrichedSimilarCases] = await enrichSimilarCases([similarCases]);
 
     res.status(200).json({
       aiAssistance,
@@ -193,4 +200,55 @@ export const getCaseProcessed = async (req, res) => {
     console.error("Error in getCaseProcessed:", error);
     res.status(500).json({ message: 'Error processing case', error: error.message });
   }
-};
\ No newline at end of file
+};
+
+const buildProcessPayload = (caseDetails) => ({
+  caseId: caseDetails.caseId,
+  caseSummary: caseDetails.caseSummary,
+  groundsOfBail: caseDetails.groundsOfBail,
+  judgeComments: caseDetails.judgeComments,
+  caseTitle: caseDetails.caseTitle,
+  bnsSections: caseDetails.bnsSections,
+  casePoints: caseDetails.casePoints ? Object.fromEntries(caseDetails.casePoints) : {},
+});
+
+export const getCasesProcessedBatch = async (req, res) => {
+  try {
+    const { entity } = req.params;
+    const { caseIds, includeAiAssistance = false, topK = 5 } = req.body;
+
+    if (!Array.isArray(caseIds) || caseIds.length === 0) {
+      return res.status(400).json({ message: 'caseIds must be a non-empty array' });
+    }
+
+    const caseDetailsList = await Case.find({ caseId: { $in: caseIds } });
+    if (!caseDetailsList.length) {
+      return res.status(404).json({ message: 'No cases found' });
+    }
+
+    const response = await axiosInstance.post('/find-similar-cases/batch', {
+      entity,
+      includeAiAssistance,
+      topK,
+      projection: SIMILAR_CASE_PROJECTION,
+      cases: caseDetailsList.map(buildProcessPayload),
+    });
+
+    const results = Array.isArray(response?.data?.results) ? response.data.results : [];
+
+    const enrichedSimilarCases = await enrichSimilarCases(results.map(result => result.similarCases || []));
+    const currentById = new Map(caseDetailsList.map(cd => [cd.caseId, cd]));
+
+    res.status(200).json({
+      results: results.map((result, index) => ({
+        aiAssistance: result.aiAssistance ?? null,
+        bailDecision: result.bailDecision ?? null,
+        currentCase: currentById.get(result.caseId) ?? null,
+        similarCases: enrichedSimilarCases[index],
+      })),
+    });
+  } catch (error) {
+    console.error("Error in getCasesProcessedBatch:", error);
+    res.status(500).json({ message: 'Error processing cases', error: error.message });
+  }
+};
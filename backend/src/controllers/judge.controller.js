@@ -2,6 +2,15 @@ import { Judge } from "../models/judge.model.js";
 import { Case } from "../models/case.model.js";
 import bcrypt from "bcryptjs";
 import generateToken from "../utils/generate.token.js";
+import { axiosInstance } from "../utils/axios.js";
+
+// lets the ML service index the ruling right away instead of on its next poll; the service reads
+// the case from the database itself, so a failure here only delays it
+const notifySimilarityIndex = (caseId) => {
+  const headers = process.env.CASE_INGEST_TOKEN ? { "X-Ingest-Token": process.env.CASE_INGEST_TOKEN } : {};
+  axiosInstance.post("/case-index/cases", { caseIds: [caseId] }, { headers })
+    .catch((error) => console.error("Error notifying similarity index:", error.message));
+};
 
 export const judgeSignup = async (req, res) => {
   try {
@@ -160,6 +169,7 @@ export const decideBail = async(req, res) => {
       return res.status(404).json({ message: "Case not found" });
     }
 
+    notifySimilarityIndex(caseid);
     res.status(200).json({ message: "Bail decided", updatedCase });
     
   } catch (error) {
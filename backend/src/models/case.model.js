@@ -84,4 +84,8 @@ const caseSchema = new Schema({
     },
 }, { timestamps: true }, { strict: true });
 
+// the ML service polls changes by updatedAt and fingerprints decided cases by their latest updatedAt
+caseSchema.index({ updatedAt: -1 });
+caseSchema.index({ bailStatus: 1, updatedAt: -1 });
+
 export const Case = mongoose.model('Case', caseSchema);
\ No newline at end of file
@@ -1,9 +1,10 @@
 import { Router } from "express";
-import { caseRegister, getCaseProcessed } from "../controllers/case.controller.js";
+import { caseRegister, getCaseProcessed, getCasesProcessedBatch } from "../controllers/case.controller.js";
 
 const router = Router();
 
 router.post("/register", caseRegister);
 router.post("/:entity/:caseid/process-case", getCaseProcessed);
+router.post("/:entity/process-cases", getCasesProcessedBatch);
 
 export default router;
\ No newline at end of file
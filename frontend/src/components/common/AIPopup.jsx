@@ -126,12 +126,13 @@ const AIPopup = ({ isOpen, onClose, data, isLoading, error }) => {
                 <div className="space-y-4">
                   {relatedCases.length > 0 ? (
                     relatedCases.map((caseItem) => {
-                      const isExpanded = expandedCase === caseItem._id;
+                      const caseKey = caseItem._id ?? caseItem.caseId;
+                      const isExpanded = expandedCase === caseKey;
                       return (
-                        <div key={caseItem._id} className="mb-4">
+                        <div key={caseKey} className="mb-4">
                           <div
                             className="bg-white dark:bg-gray-800 border border-gray-300 dark:border-gray-600 rounded-lg shadow-sm hover:shadow-md cursor-pointer transition-all duration-300 overflow-hidden"
-                            onClick={() => handleToggle(caseItem._id)}
+                            onClick={() => handleToggle(caseKey)}
                           >
                             <div className="border-l-4 border-blue-500">
                               <div className="p-4">
@@ -209,7 +210,7 @@ const AIPopup = ({ isOpen, onClose, data, isLoading, error }) => {
                                   <div 
                                     className="pl-9 prose prose-sm max-w-none"
                                     dangerouslySetInnerHTML={{ 
-                                      __html: `<p class="mb-3">${renderMarkdown(caseItem.caseSummary)}</p>` 
+                                      __html: `<p class="mb-3">${renderMarkdown(caseItem.caseSummary ?? caseItem.summaryExcerpt)}</p>` 
                                     }}
                                   />
                                 </div>
@@ -1,6 +1,6 @@
 import os
 import sys
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 
@@ -10,15 +10,64 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
 from routes.similar_case_route import similar_case_bp
+from routes.case_index_route import case_index_bp
+from utils.aiassistancegenerator import get_ai_cache_stats
+from utils.caseingest import ensure_change_stream_tail
+from utils.similarcasefetcher import case_index, get_similar_case_cache_stats
+from utils.metrics import registry
 
 app = Flask(__name__)
 
+def _service_gauges():
+    cache = get_ai_cache_stats()
+    results = get_similar_case_cache_stats()
+    return [
+        ("jurisdict_case_index_size", "Decided cases held in the similarity index.", len(case_index)),
+        ("jurisdict_case_index_version", "Mutation counter of the similarity index.", case_index.version),
+        ("jurisdict_ai_cache_size", "Entries in the AI assistance cache.", cache["size"]),
+        ("jurisdict_ai_cache_hit_rate", "Hit rate of the AI assistance cache.", cache["hitRate"]),
+        ("jurisdict_similar_case_cache_size", "Rankings held in the similar-case result cache.", results["size"]),
+        ("jurisdict_similar_case_cache_hits", "Similar-case lookups answered from the result cache.", results["hits"]),
+        ("jurisdict_similar_case_cache_misses", "Similar-case lookups that had to be scored.", results["misses"]),
+        ("jurisdict_similar_case_cache_hit_rate", "Hit rate of the similar-case result cache.", results["hitRate"]),
+    ]
+
+registry.register_collector(_service_gauges)
+
 app.register_blueprint(similar_case_bp, url_prefix='/find-similar-cases')
+app.register_blueprint(case_index_bp, url_prefix='/case-index')
+
+@app.before_request
+def start_change_stream_tail():
+    # started per worker on its first request, a thread started before gunicorn forks would not survive
+    ensure_change_stream_tail()
 
 @app.route('/health', methods=['POST'])
 def health_check():
     return jsonify({"status": "healthy"}), 200
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    status = {
+        "status": "ready" if case_index.is_warm else "warming",
+        "indexedCases": len(case_index),
+        "indexVersion": case_index.version,
+        "pid": os.getpid()
+    }
+    return jsonify(status), 200 if case_index.is_warm else 503
+
+@app.route('/ai-cache-stats', methods=['GET'])
+def ai_cache_stats():
+    return jsonify(get_ai_cache_stats()), 200
+
+@app.route('/similar-case-cache-stats', methods=['GET'])
+def similar_case_cache_stats():
+    return jsonify(get_similar_case_cache_stats()), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
 if __name__ == '__main__':
     port = int(os.getenv("PORT", 5001))
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
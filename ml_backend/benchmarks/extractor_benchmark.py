@@ -0,0 +1,91 @@
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.similarcasefetcher import BAIL_FACTORS, LEGAL_KEYWORDS, _clean_and_tokenize, _extract_legal_themes
+
+FILLER = (
+    "the accused was arrested by the police after a complaint was lodged at the station "
+    "the prosecution submitted that the investigation is complete and the chargesheet has been filed "
+    "the learned counsel argued that the applicant has been in custody and deserves relief"
+).split()
+
+ENTITY_SNIPPETS = [
+    "under section {n} of the bharatiya nyaya sanhita code",
+    "a sum of rs. {n},000 lakh was recovered",
+    "the offence is punishable with {n} years of imprisonment",
+    "booked under the narcotic drugs and psychotropic substances act",
+]
+
+
+def _reference_extract_legal_themes(text, tokens):
+    themes = {}
+    text_lower = text.lower()
+
+    for category, keywords in LEGAL_KEYWORDS.items():
+        score = sum(text_lower.count(keyword) for keyword in keywords if keyword in text_lower)
+        if score > 0:
+            themes[category] = score
+
+    for category, keywords in BAIL_FACTORS.items():
+        score = sum(text_lower.count(keyword) for keyword in keywords if keyword in text_lower)
+        if score > 0:
+            themes[f"bail_{category}"] = score
+
+    return themes
+
+
+def _reference_extract_entities(text):
+    return {
+        'sections': list(set(re.findall(r'section\s+(\d+[a-z]?)', text.lower()))),
+        'amounts': list(set(re.findall(r'rs\.?\s*(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lakh|crore)?', text.lower()))),
+        'years': list(set(re.findall(r'(\d+)\s*years?', text.lower()))),
+        'acts': list(set(re.findall(r'([a-z\s]+(?:act|code))', text.lower())))
+    }
+
+
+def make_summary(rng, words):
+    keywords = [k for group in (LEGAL_KEYWORDS, BAIL_FACTORS) for ks in group.values() for k in ks]
+    parts = []
+    while len(parts) < words:
+        roll = rng.random()
+        if roll < 0.15:
+            parts.append(rng.choice(keywords))
+        elif roll < 0.18:
+            parts.append(rng.choice(ENTITY_SNIPPETS).format(n=rng.randint(1, 500)))
+        else:
+            parts.append(rng.choice(FILLER))
+    return " ".join(parts)
+
+
+def _per_text_us(fn, texts, number):
+    return timeit.timeit(lambda: [fn(t) for t in texts], number=number) * 1e6 / (len(texts) * number)
+
+
+def main():
+    rng = random.Random(42)
+    number = int(os.getenv("BENCH_REPEAT", 5))
+    adversarial = [
+        "evidencevidence theftheft seriouserious escapescape health heahealth",
+        "attempt to murderash driving grievous hurtrial\tcriminal\nrecord Act CODE act1code",
+    ]
+
+    print(f"{'words':>5}  {'themes legacy':>14} {'compiled':>9}  speedup")
+    for words in (60, 250, 1000, 4000):
+        texts = [_clean_and_tokenize(make_summary(rng, words))[0] for _ in range(20)]
+
+        for text in texts + [make_summary(rng, words)] + adversarial:
+            assert _extract_legal_themes(text, None) == _reference_extract_legal_themes(text, None)
+
+        themes_legacy = _per_text_us(lambda t: _reference_extract_legal_themes(t, None), texts, number)
+        themes_compiled = _per_text_us(lambda t: _extract_legal_themes(t, None), texts, number)
+
+        print(f"{words:>5}  {themes_legacy:11.1f} us {themes_compiled:6.1f} us  {themes_legacy / themes_compiled:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
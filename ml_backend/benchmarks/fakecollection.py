@@ -0,0 +1,137 @@
+import itertools
+
+
+def _contains(argument, value):
+    try:
+        return value in argument
+    except TypeError:
+        return False
+
+
+def _prepare(query):
+    # $in/$nin lists become sets once per query, refreshes match hundreds of ids against every document
+    prepared = {}
+    for key, condition in (query or {}).items():
+        if isinstance(condition, dict) and any(op in ("$in", "$nin") for op in condition):
+            condition = {op: frozenset(argument) if op in ("$in", "$nin") else argument
+                         for op, argument in condition.items()}
+        prepared[key] = condition
+    return prepared
+
+
+def _matches(document, query):
+    for key, condition in query.items():
+        value = document.get(key)
+        if isinstance(condition, dict) and any(op.startswith("$") for op in condition):
+            for op, argument in condition.items():
+                if op == "$in" and not _contains(argument, value):
+                    return False
+                if op == "$nin" and _contains(argument, value):
+                    return False
+                if op == "$ne" and value == argument:
+                    return False
+                if op == "$exists" and (key in document) != bool(argument):
+                    return False
+                if op in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if op == "$gt" and not value > argument:
+                        return False
+                    if op == "$gte" and not value >= argument:
+                        return False
+                    if op == "$lt" and not value < argument:
+                        return False
+                    if op == "$lte" and not value <= argument:
+                        return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(document, projection):
+    if not projection:
+        return dict(document)
+    included = [key for key, flag in projection.items() if flag and key != "_id"]
+    if included:
+        result = {key: document[key] for key in included if key in document}
+        if projection.get("_id", 1) and "_id" in document:
+            result["_id"] = document["_id"]
+        return result
+    return {key: value for key, value in document.items() if projection.get(key, 1)}
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self._documents = documents
+
+    def __iter__(self):
+        return iter(self._documents)
+
+    def limit(self, count):
+        return FakeCursor(self._documents[:count] if count else self._documents)
+
+    def skip(self, count):
+        return FakeCursor(self._documents[count:])
+
+    def sort(self, key, direction=1):
+        return FakeCursor(sorted(self._documents, key=lambda d: d.get(key), reverse=direction < 0))
+
+    def batch_size(self, size):
+        return self
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self._ids = itertools.count(1)
+        self.documents = []
+        self.insert_many(documents)
+
+    def find(self, query=None, projection=None, batch_size=None):
+        query = _prepare(query)
+        return FakeCursor([_project(d, projection) for d in self.documents if _matches(d, query)])
+
+    def find_one(self, query=None, projection=None):
+        return next(iter(self.find(query, projection)), None)
+
+    def count_documents(self, query):
+        query = _prepare(query)
+        return sum(1 for d in self.documents if _matches(d, query))
+
+    def create_index(self, keys, **kwargs):
+        return keys if isinstance(keys, str) else "_".join(f"{key}_{direction}" for key, direction in keys)
+
+    def bulk_write(self, operations, ordered=True):
+        # UpdateOne keeps its arguments in private slots, this fake only needs the $set upserts the jobs send
+        for operation in operations:
+            self.update_one(operation._filter, operation._doc, upsert=operation._upsert)
+
+    def insert_many(self, documents):
+        for document in documents:
+            self.insert_one(document)
+
+    def insert_one(self, document):
+        document = dict(document)
+        document.setdefault("_id", next(self._ids))
+        self.documents.append(document)
+
+    def replace_one(self, query, replacement, upsert=False):
+        for position, document in enumerate(self.documents):
+            if _matches(document, query):
+                self.documents[position] = dict(replacement, _id=document["_id"])
+                return
+        if upsert:
+            self.insert_one(dict(query, **replacement))
+
+    def update_one(self, query, update, upsert=False):
+        for document in self.documents:
+            if _matches(document, query):
+                document.update(update.get("$set", {}))
+                return
+        if upsert:
+            self.insert_one(dict(query, **update.get("$set", {})))
+
+    def delete_one(self, query):
+        for position, document in enumerate(self.documents):
+            if _matches(document, query):
+                del self.documents[position]
+                return
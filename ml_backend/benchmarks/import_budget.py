@@ -0,0 +1,52 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ML_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ["pymongo", "google.generativeai", "scipy"]
+
+PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import app\n"
+    "elapsed = (time.perf_counter() - start) * 1000\n"
+    "print(json.dumps({'ms': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))\n"
+) % (LAZY_MODULES,)
+
+
+def measure(runs):
+    samples = []
+    loaded = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=ML_BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        samples.append(result["ms"])
+        loaded.update(result["loaded"])
+    return samples, sorted(loaded)
+
+
+def main():
+    budget_ms = float(os.getenv("IMPORT_BUDGET_MS", 600))
+    samples, loaded = measure(int(os.getenv("IMPORT_BUDGET_RUNS", 5)))
+
+    report = {
+        "budgetMs": budget_ms,
+        "minMs": round(min(samples), 1),
+        "medianMs": round(statistics.median(samples), 1),
+        "eagerlyLoaded": loaded,
+    }
+    print(json.dumps(report, indent=2))
+
+    if report["medianMs"] > budget_ms or loaded:
+        print("import budget exceeded" if report["medianMs"] > budget_ms else "lazy modules were imported at startup",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+sys.path.append(BENCHMARKS_DIR)
+
+os.environ["CASE_INDEX_REFRESH_SECONDS"] = "inf"
+os.environ["CASE_INDEX_FULL_REFRESH_SECONDS"] = "inf"
+
+from fakecollection import FakeCollection
+from synthetic import make_case, make_corpus, make_queries
+import utils.similarcasefetcher as similarcasefetcher
+from utils.caseingest import ingest_cases
+
+
+def _percentile(samples, fraction):
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(len(samples) * fraction))], 3)
+
+
+def run(size, rulings, semantic_scorer):
+    collection = FakeCollection(make_corpus(size))
+    similarcasefetcher.get_case_collection = lambda: collection
+    similarcasefetcher.warm_case_index()
+    similarcasefetcher.find_similar_cases(make_queries(1)[0], semantic_scorer)
+
+    rng = random.Random(41)
+    ingest_ms = []
+    searchable_ms = []
+    found = 0
+    for number in range(rulings):
+        ruling = make_case(rng, 2 * 10 ** 9 + number, rng.choice(["Accepted", "Declined"]))
+        started = time.perf_counter()
+        ingest_cases([ruling])
+        ingested = time.perf_counter()
+        # the ruling itself as the query, so it has to come back first once it is searchable
+        results = similarcasefetcher.find_similar_cases(dict(ruling, caseId=None), semantic_scorer)
+        ingest_ms.append((ingested - started) * 1000)
+        searchable_ms.append((time.perf_counter() - started) * 1000)
+        found += bool(results) and results[0]["caseId"] == ruling["caseId"]
+
+    return {
+        "decidedCases": size,
+        "rulings": rulings,
+        "semanticScorer": semantic_scorer,
+        "ingestP50Ms": _percentile(ingest_ms, 0.5),
+        "ingestP95Ms": _percentile(ingest_ms, 0.95),
+        "ingestPlusFirstQueryP50Ms": _percentile(searchable_ms, 0.5),
+        "ingestPlusFirstQueryP95Ms": _percentile(searchable_ms, 0.95),
+        "rankedFirst": found,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long a pushed ruling takes to become searchable.")
+    parser.add_argument("--size", type=int, default=20000, help="decided-corpus size")
+    parser.add_argument("--rulings", type=int, default=50)
+    parser.add_argument("--semantic-scorer", default="jaccard", choices=["jaccard", "tfidf"])
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.size, args.rulings, args.semantic_scorer), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+sys.path.append(BENCHMARKS_DIR)
+
+os.environ["CASE_INDEX_REFRESH_SECONDS"] = "inf"
+os.environ["CASE_INDEX_FULL_REFRESH_SECONDS"] = "inf"
+# repeated queries must be scored every time, not answered from the result cache
+os.environ["SIMILAR_CASE_CACHE_MAXSIZE"] = "0"
+
+from fakecollection import FakeCollection
+from synthetic import make_corpus, make_queries
+import utils.similarcasefetcher as similarcasefetcher
+from utils.minhash import MinHashLSH, lsh_threshold
+
+DEFAULT_CONFIGS = "32x2,32x3,32x4,20x6,16x8"
+
+
+def _parse_configs(configs):
+    parsed = []
+    for config in configs.split(","):
+        bands, rows = config.strip().lower().split("x")
+        parsed.append((int(bands), int(rows)))
+    return parsed
+
+
+def _case_ids(results):
+    return [case["caseId"] for case in results]
+
+
+def _mean_candidates(queries, lsh):
+    total = 0
+    for query in queries:
+        current = similarcasefetcher.QueryFeatures(query)
+        section_scores = similarcasefetcher._batch_section_similarity(current, similarcasefetcher.case_index)
+        if lsh is None:
+            total += len(similarcasefetcher.case_index.candidates(current.index_terms(), section_scores))
+        else:
+            total += len(lsh.query(current.token_strings()).union(section_scores))
+    return total / len(queries)
+
+
+def _timed(fn, queries):
+    started = time.perf_counter()
+    results = [fn(query) for query in queries]
+    return results, (time.perf_counter() - started) * 1000 / len(queries)
+
+
+def run(size, query_count, configs, top_k, semantic_scorer):
+    collection = FakeCollection(make_corpus(size))
+    similarcasefetcher.get_case_collection = lambda: collection
+    similarcasefetcher.warm_case_index()
+    queries = make_queries(query_count)
+
+    exact, exact_ms = _timed(
+        lambda q: _case_ids(similarcasefetcher.find_similar_cases(q, semantic_scorer, top_k, "exact")), queries)
+    report = {
+        "decidedCases": size,
+        "queries": query_count,
+        "topK": top_k,
+        "semanticScorer": semantic_scorer,
+        "exact": {"meanMs": round(exact_ms, 3), "meanCandidates": round(_mean_candidates(queries, None), 1)},
+        "lsh": [],
+    }
+
+    for bands, rows in configs:
+        started = time.perf_counter()
+        lsh = similarcasefetcher.case_index.attach_lsh(MinHashLSH(bands, rows))
+        build_s = time.perf_counter() - started
+
+        approximate, approximate_ms = _timed(
+            lambda q: _case_ids(similarcasefetcher.find_similar_cases(q, semantic_scorer, top_k, "lsh")), queries)
+        hits = sum(len(set(a) & set(e)) for a, e in zip(approximate, exact))
+        expected = sum(len(e) for e in exact)
+
+        report["lsh"].append({
+            "bands": bands,
+            "rows": rows,
+            "jaccardThreshold": round(lsh_threshold(bands, rows), 3),
+            "buildSeconds": round(build_s, 3),
+            "recallAtK": round(hits / expected, 4) if expected else 1.0,
+            "exactListMatch": round(sum(a == e for a, e in zip(approximate, exact)) / len(queries), 4),
+            "meanCandidates": round(_mean_candidates(queries, lsh), 1),
+            "meanMs": round(approximate_ms, 3),
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure recall@k of MinHash-LSH candidates against the exact path.")
+    parser.add_argument("--size", type=int, default=10000, help="decided-corpus size")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--configs", default=DEFAULT_CONFIGS, help="comma separated BANDSxROWS settings")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--semantic-scorer", default="jaccard", choices=["jaccard", "tfidf"])
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.size, args.queries, _parse_configs(args.configs), args.top_k, args.semantic_scorer), indent=2))
+
+
+if __name__ == '__main__':
+    main()
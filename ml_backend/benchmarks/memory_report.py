@@ -0,0 +1,85 @@
+import argparse
+import gc
+import hashlib
+import json
+import os
+import sys
+import tracemalloc
+from collections import Counter
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+sys.path.append(BENCHMARKS_DIR)
+
+from extractor_benchmark import _reference_extract_entities
+from synthetic import make_corpus
+from utils.similarcasefetcher import (
+    CaseFeatures, _clean_and_tokenize, _compose_enhanced_text, _extract_legal_themes, _section_number
+)
+from utils.vocabulary import vocabulary
+
+
+class LegacyCaseFeatures:
+    # the per-case representation before interning: token lists, sets, Counters and dicts of strings
+    def __init__(self, case):
+        clean_text, tokens = _clean_and_tokenize(_compose_enhanced_text(case))
+        sections = [str(s) for s in case.get("bnsSections", [])]
+        grounds = [str(g) for g in case.get("groundsOfBail", [])]
+        self.case_id = case.get("caseId")
+        self.bail_status = case.get("bailStatus")
+        self.signature = hashlib.md5(
+            f"{self.case_id}|{','.join(sorted(sections))}|{','.join(sorted(grounds))}".encode()).hexdigest()
+        self.tokens = tokens
+        self.token_set = set(tokens)
+        self.token_counts = Counter(tokens)
+        self.themes = _extract_legal_themes(clean_text, tokens)
+        self.entities = _reference_extract_entities(clean_text)
+        self.sections = case.get("bnsSections", []) or []
+        self.section_set = set(str(s).strip().lower() for s in self.sections)
+        self.section_numbers = {s: n for s in self.section_set if (n := _section_number(s)) is not None}
+        self.grounds = set(str(g).lower().strip() for g in case.get("groundsOfBail", []) or [])
+
+
+def _measure(featurize, cases):
+    gc.collect()
+    tracemalloc.start()
+    features = [featurize(case) for case in cases]
+    gc.collect()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated, features
+
+
+def run(size):
+    cases = make_corpus(size)
+    # warm the keyword memo first so neither side is charged for it
+    for case in cases:
+        LegacyCaseFeatures(case)
+
+    legacy_bytes, legacy = _measure(LegacyCaseFeatures, cases)
+    del legacy
+    vocabulary_before = vocabulary.nbytes()
+    compact_bytes, compact = _measure(CaseFeatures, cases)
+    vocabulary_bytes = vocabulary.nbytes() - vocabulary_before
+
+    return {
+        "cases": size,
+        "vocabularySize": len(vocabulary),
+        "legacyBytesPerCase": round(legacy_bytes / size, 1),
+        "compactBytesPerCase": round(compact_bytes / size, 1),
+        "ofWhichVocabularyBytesPerCase": round(vocabulary_bytes / size, 1),
+        "reduction": round(legacy_bytes / compact_bytes, 2) if compact_bytes else None,
+        "meanTokensPerCase": round(sum(len(f.token_ids) for f in compact) / size, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bytes per case of the legacy and compact feature representations.")
+    parser.add_argument("--sizes", default="1000,10000", help="comma separated corpus sizes")
+    args = parser.parse_args()
+
+    print(json.dumps([run(int(size)) for size in args.sizes.split(",") if size.strip()], indent=2))
+
+
+if __name__ == '__main__':
+    main()
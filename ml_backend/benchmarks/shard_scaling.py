@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+sys.path.append(BENCHMARKS_DIR)
+
+os.environ["CASE_INDEX_REFRESH_SECONDS"] = "inf"
+os.environ["CASE_INDEX_FULL_REFRESH_SECONDS"] = "inf"
+# repeated queries must be scored every time, not answered from the result cache
+os.environ["SIMILAR_CASE_CACHE_MAXSIZE"] = "0"
+
+from fakecollection import FakeCollection
+from synthetic import make_corpus, make_queries
+import utils.similarcasefetcher as similarcasefetcher
+from utils.shardedscorer import ShardedScorer
+
+
+def _latencies(fn, queries):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples
+
+
+def run(size, query_count, shard_counts, semantic_scorer, batch_size):
+    collection = FakeCollection(make_corpus(size))
+    similarcasefetcher.get_case_collection = lambda: collection
+    similarcasefetcher.warm_case_index()
+    queries = make_queries(query_count)
+
+    report = {"decidedCases": size, "queries": query_count, "semanticScorer": semantic_scorer,
+              "cpuCount": os.cpu_count(), "results": []}
+    baseline = None
+    for shards in shard_counts:
+        similarcasefetcher.sharded_scorer.reset()
+        similarcasefetcher.sharded_scorer = ShardedScorer(shards, 0)
+
+        started = time.perf_counter()
+        similarcasefetcher.find_similar_cases(queries[0], semantic_scorer)
+        startup_s = time.perf_counter() - started
+
+        samples = _latencies(lambda q: similarcasefetcher.find_similar_cases(q, semantic_scorer), queries)
+        started = time.perf_counter()
+        for start in range(0, len(queries), batch_size):
+            similarcasefetcher.find_similar_cases_batch(queries[start:start + batch_size], semantic_scorer)
+        batch_s = time.perf_counter() - started
+
+        p50 = samples[len(samples) // 2]
+        baseline = baseline or p50
+        report["results"].append({
+            "shards": shards,
+            "startupSeconds": round(startup_s, 3),
+            "p50Ms": round(p50, 3),
+            "p95Ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+            "speedup": round(baseline / p50, 2),
+            "batchQueriesPerSec": round(len(queries) / batch_s, 2),
+        })
+        print(f"{shards:>3} shards  p50 {p50:8.1f} ms  batch {len(queries) / batch_s:7.1f} q/s", file=sys.stderr)
+    similarcasefetcher.sharded_scorer.reset()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how sharded scoring scales with the number of shards.")
+    parser.add_argument("--size", type=int, default=50000, help="decided-corpus size")
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--shards", default="1,2,4,8", help="comma separated shard counts, 1 scores in process")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--semantic-scorer", default="jaccard", choices=["jaccard", "tfidf"])
+    args = parser.parse_args()
+
+    shard_counts = [int(s) for s in args.shards.split(",") if s.strip()]
+    print(json.dumps(run(args.size, args.queries, shard_counts, args.semantic_scorer, args.batch_size), indent=2))
+
+
+if __name__ == '__main__':
+    main()
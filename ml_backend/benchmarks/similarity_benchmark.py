@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ML_BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.append(ML_BACKEND_DIR)
+sys.path.append(BENCHMARKS_DIR)
+
+DEFAULT_SIZES = "1000,10000,100000"
+REGRESSION_TOLERANCE = 0.10
+
+
+def _summarize(samples_ms, elapsed_s):
+    import numpy as np
+
+    samples = np.array(samples_ms)
+    return {
+        "count": len(samples_ms),
+        "meanMs": round(float(samples.mean()), 3),
+        "p50Ms": round(float(np.percentile(samples, 50)), 3),
+        "p95Ms": round(float(np.percentile(samples, 95)), 3),
+        "p99Ms": round(float(np.percentile(samples, 99)), 3),
+        "throughputPerSec": round(len(samples_ms) / elapsed_s, 2) if elapsed_s else None,
+    }
+
+
+def _time_calls(fn, items):
+    samples = []
+    started = time.perf_counter()
+    for item in items:
+        call_started = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - call_started) * 1000)
+    return _summarize(samples, time.perf_counter() - started)
+
+
+def _peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_size(size, query_count, semantic_scorer, ai_delay):
+    os.environ["CASE_INDEX_REFRESH_SECONDS"] = "inf"
+    os.environ["CASE_INDEX_FULL_REFRESH_SECONDS"] = "inf"
+    # repeated queries must be scored every time, not answered from the result cache
+    os.environ["SIMILAR_CASE_CACHE_MAXSIZE"] = "0"
+
+    from fakecollection import FakeCollection
+    from synthetic import make_corpus, make_queries
+    import utils.similarcasefetcher as similarcasefetcher
+    from utils.baildecider import decide_bail
+
+    collection = FakeCollection(make_corpus(size))
+    similarcasefetcher.get_case_collection = lambda: collection
+    queries = make_queries(query_count)
+
+    rss_before_index = _peak_rss_bytes()
+    started = time.perf_counter()
+    similarcasefetcher.warm_case_index()
+    index_build_s = time.perf_counter() - started
+
+    result = {
+        "decidedCases": size,
+        "queries": query_count,
+        "semanticScorer": semantic_scorer,
+        "indexBuildSeconds": round(index_build_s, 3),
+        "findSimilarCases": _time_calls(lambda q: similarcasefetcher.find_similar_cases(q, semantic_scorer), queries),
+        "decideBail": _time_calls(decide_bail, [q["casePoints"] for q in queries] * 20),
+    }
+
+    from flask import request
+    from app import app
+    import controllers.similarcasefetcher_controller as controller
+
+    def stub_ai_assistance(bail_decision_data, entity):
+        time.sleep(ai_delay)
+        return "stubbed assistance"
+
+    controller.generate_ai_assistance = stub_ai_assistance
+    os.environ.setdefault("SEMANTIC_SCORER", semantic_scorer)
+
+    def full_pipeline(query):
+        with app.test_request_context(json=dict(query, entity="judge", updatedAt=None)):
+            controller.similarCaseFetcher(request)
+
+    result["similarCaseFetcher"] = _time_calls(full_pipeline, queries)
+    result["peakRssBytes"] = _peak_rss_bytes()
+    result["rssBeforeIndexBytes"] = rss_before_index
+    return result
+
+
+def compare_with_baseline(results, baseline):
+    regressions = []
+    previous = {(r["decidedCases"], r["semanticScorer"]): r for r in baseline.get("results", [])}
+    for current in results:
+        before = previous.get((current["decidedCases"], current["semanticScorer"]))
+        if not before:
+            continue
+        for stage in ("findSimilarCases", "decideBail", "similarCaseFetcher"):
+            for metric in ("p50Ms", "p95Ms"):
+                old, new = before[stage][metric], current[stage][metric]
+                if old and new > old * (1 + REGRESSION_TOLERANCE):
+                    regressions.append({
+                        "decidedCases": current["decidedCases"], "stage": stage, "metric": metric,
+                        "baseline": old, "current": new, "change": round(new / old - 1, 3)
+                    })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark find_similar_cases, decide_bail and the full pipeline.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated decided-corpus sizes")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--semantic-scorer", default="jaccard", choices=["jaccard", "tfidf"])
+    parser.add_argument("--ai-delay", type=float, default=0.0, help="seconds the stubbed LLM call sleeps")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--worker-size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_size is not None:
+        print(json.dumps(run_size(args.worker_size, args.queries, args.semantic_scorer, args.ai_delay)))
+        return
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        # each corpus size runs in a fresh interpreter so peak RSS is not inherited from the previous run
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker-size", str(size), "--queries", str(args.queries),
+             "--semantic-scorer", args.semantic_scorer, "--ai-delay", str(args.ai_delay)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+        print(f"{size:>7} cases  find_similar_cases p50 {results[-1]['findSimilarCases']['p50Ms']} ms", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "queries": args.queries,
+            "semanticScorer": args.semantic_scorer,
+            "aiDelaySeconds": args.ai_delay,
+        },
+        "results": results,
+    }
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            report["regressions"] = compare_with_baseline(results, json.load(baseline_file))
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(rendered + "\n")
+    else:
+        print(rendered)
+
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import datetime
+import random
+
+from utils.similarcasefetcher import BAIL_FACTORS, LEGAL_KEYWORDS
+
+BNS_SECTIONS = [
+    "101", "103", "105", "109", "115", "117", "118", "126", "137", "140", "303", "304", "305", "309",
+    "310", "316", "318", "319", "324", "329", "331", "61", "64", "65", "74", "75", "78", "79", "85",
+    "111", "112", "302", "307", "376", "395", "397", "420", "406", "409", "468", "471", "326", "325",
+    "363", "366", "392"
+]
+
+GROUNDS_OF_BAIL = [
+    "First time offender", "Prolonged incarceration", "Medical grounds", "Sole breadwinner of the family",
+    "Parity with co-accused", "Investigation complete", "Chargesheet filed", "No criminal antecedents",
+    "Cooperation with investigation", "False implication", "Permanent resident", "Advanced age",
+    "Minor role in offence", "No risk of absconding", "Evidence is documentary"
+]
+
+EVIDENCE = ["CCTV footage", "DNA", "confession", "eyewitness testimony", "documents", "call records", "forensic report"]
+
+COURTS = ["Sessions Court, Delhi", "High Court of Bombay", "District Court, Pune", "Sessions Court, Lucknow",
+          "Chief Judicial Magistrate, Patna", "High Court of Madras"]
+
+NAMES = ["Ramesh Kumar", "Sunita Devi", "Arjun Singh", "Fatima Khan", "Vikram Rao", "Anita Sharma",
+         "Imran Sheikh", "Pooja Verma", "Rahul Mehta", "Kavita Nair"]
+
+FILLER_SENTENCES = [
+    "The accused was arrested by the police on the basis of the complaint lodged by the informant.",
+    "The prosecution submitted that the investigation revealed the active involvement of the applicant.",
+    "Learned counsel for the applicant argued that the applicant has been falsely implicated.",
+    "The chargesheet has been filed and the trial is likely to take considerable time.",
+    "The applicant has undertaken to abide by any conditions that may be imposed by the court.",
+    "The public prosecutor opposed the application citing the nature of the allegations.",
+    "The complainant alleged that the incident took place late in the evening near the market.",
+    "The recovery memo records the items seized from the possession of the accused.",
+]
+
+STATUS_WEIGHTS = [("Accepted", 0.45), ("Declined", 0.35), ("Pending to judge", 0.1), ("Pending to lawyer", 0.1)]
+
+
+def _keyword_sentence(rng):
+    group = rng.choice([LEGAL_KEYWORDS, BAIL_FACTORS])
+    category = rng.choice(list(group))
+    keywords = rng.sample(group[category], min(len(group[category]), rng.randint(1, 3)))
+    return f"The record discloses allegations involving {', '.join(keywords)} which the court must weigh."
+
+
+def make_summary(rng, min_length=250):
+    sentences = []
+    while sum(len(s) + 1 for s in sentences) < min_length or len(sentences) < 4:
+        roll = rng.random()
+        if roll < 0.45:
+            sentences.append(_keyword_sentence(rng))
+        elif roll < 0.55:
+            sentences.append(f"The offence is alleged under section {rng.choice(BNS_SECTIONS)} of the Bharatiya Nyaya Sanhita code.")
+        elif roll < 0.6:
+            sentences.append(f"An amount of Rs. {rng.randint(1, 900)},000 lakh is alleged to have been misappropriated.")
+        elif roll < 0.65:
+            sentences.append(f"The offence carries a punishment of up to {rng.randint(1, 14)} years.")
+        else:
+            sentences.append(rng.choice(FILLER_SENTENCES))
+    return " ".join(sentences)
+
+
+def _flag(rng, probability):
+    return "true" if rng.random() < probability else "false"
+
+
+def make_case_points(rng, bns_sections):
+    has_prior_record = _flag(rng, 0.3)
+    return {
+        "bnsSections": ", ".join(bns_sections),
+        "crimeType": rng.choice(["Violent", "Economic", "Property", "Cyber", "Narcotics"]),
+        "accusedAge": str(rng.randint(18, 75)),
+        "daysInDetention": str(rng.randint(0, 400)),
+        "hasPriorRecord": has_prior_record,
+        "priorConvictionSections": ", ".join(rng.sample(BNS_SECTIONS, rng.randint(1, 2))) if has_prior_record == "true" else "",
+        "hasPermanentAddress": _flag(rng, 0.8),
+        "ownsProperty": _flag(rng, 0.4),
+        "isEmployed": _flag(rng, 0.6),
+        "hasLocalFamily": _flag(rng, 0.7),
+        "holdsPassport": _flag(rng, 0.2),
+        "hasFinancialMeansToTravel": _flag(rng, 0.3),
+        "availableEvidence": ", ".join(rng.sample(EVIDENCE, rng.randint(1, 4))),
+        "witnessThreatReports": _flag(rng, 0.1),
+        "evidenceTamperingReports": _flag(rng, 0.1),
+        "allegedOrganizedCrimeLinks": _flag(rng, 0.05),
+        "historyOfViolence": _flag(rng, 0.15),
+        "medicalConditions": rng.choice(["None reported"] * 4 + ["Diabetes", "Heart condition"]),
+        "isSoleFamilyEarner": _flag(rng, 0.3),
+        "allegedRoleInCrime": rng.choice(["primary", "secondary", "conspirator"]),
+    }
+
+
+def make_case(rng, number, bail_status=None, epoch=datetime.datetime(2024, 1, 1)):
+    bns_sections = rng.sample(BNS_SECTIONS, rng.randint(1, 4))
+    if bail_status is None:
+        bail_status = rng.choices([s for s, _ in STATUS_WEIGHTS], [w for _, w in STATUS_WEIGHTS])[0]
+    return {
+        "caseId": f"SYN{number:08d}",
+        "caseTitle": f"State vs {rng.choice(NAMES)}",
+        "caseSummary": make_summary(rng),
+        "bnsSections": bns_sections,
+        "groundsOfBail": rng.sample(GROUNDS_OF_BAIL, rng.randint(0, 4)),
+        "bailStatus": bail_status,
+        "courtName": rng.choice(COURTS),
+        "casePoints": make_case_points(rng, bns_sections),
+        "updatedAt": epoch + datetime.timedelta(seconds=number),
+    }
+
+
+def make_corpus(decided_cases, pending_cases=0, seed=13):
+    rng = random.Random(seed)
+    cases = [make_case(rng, number, rng.choice(["Accepted", "Declined"])) for number in range(decided_cases)]
+    cases.extend(make_case(rng, decided_cases + number, rng.choice(["Pending to judge", "Pending to lawyer"]))
+                 for number in range(pending_cases))
+    return cases
+
+
+def make_queries(count, seed=29):
+    rng = random.Random(seed)
+    return [make_case(rng, 10 ** 9 + number, "Pending to judge") for number in range(count)]
@@ -0,0 +1,79 @@
+import hmac
+import os
+from flask import jsonify
+from utils.caseingest import index_status, ingest_case_ids, ingest_cases
+from utils.metrics import ERRORS, request_trace
+import traceback
+
+CASE_INGEST_TOKEN = os.getenv("CASE_INGEST_TOKEN")
+MAX_INGEST_BATCH_SIZE = int(os.getenv("MAX_INGEST_BATCH_SIZE", 1000))
+
+def _authorized(request):
+    if not CASE_INGEST_TOKEN:
+        return True
+    return hmac.compare_digest(request.headers.get("X-Ingest-Token", ""), CASE_INGEST_TOKEN)
+
+def caseIndexIngester(request):
+    with request_trace("ingest") as trace:
+        try:
+            if not _authorized(request):
+                trace["outcome"] = "invalid"
+                return jsonify({"error": "Invalid ingest token"}), 401
+
+            payload = request.get_json(silent=True)
+            if not isinstance(payload, dict):
+                trace["outcome"] = "invalid"
+                return jsonify({"error": "Invalid JSON payload"}), 400
+
+            cases = payload.get('cases', [])
+            case_ids = payload.get('caseIds', [])
+            if payload.get('caseId') and not cases and not case_ids:
+                cases = [payload] if 'bailStatus' in payload else []
+                case_ids = [] if cases else [payload['caseId']]
+            if not isinstance(cases, list) or not isinstance(case_ids, list) or not (cases or case_ids):
+                trace["outcome"] = "invalid"
+                return jsonify({"error": "Expected a 'cases' list of case documents or a 'caseIds' list"}), 400
+            if cases and not CASE_INGEST_TOKEN:
+                # raw documents are indexed as given, only ids are re-read from the database and safe unauthenticated
+                trace["outcome"] = "invalid"
+                return jsonify({"error": "Ingesting case documents requires CASE_INGEST_TOKEN, send 'caseIds' instead"}), 403
+            if len(cases) + len(case_ids) > MAX_INGEST_BATCH_SIZE:
+                trace["outcome"] = "invalid"
+                return jsonify({"error": f"An ingest request can contain at most {MAX_INGEST_BATCH_SIZE} cases"}), 400
+
+            result = {"upserted": [], "unchanged": [], "removed": []}
+            if cases:
+                for key, ids in ingest_cases([case for case in cases if isinstance(case, dict)]).items():
+                    result[key].extend(ids)
+            if case_ids:
+                for key, ids in ingest_case_ids([str(case_id) for case_id in case_ids]).items():
+                    result[key].extend(ids)
+
+            result.update(index_status())
+            return jsonify(result), 200
+
+        except Exception as e:
+            trace["outcome"] = "error"
+            ERRORS.inc(stage="caseIndexIngester")
+            traceback.print_exc()
+            return jsonify({"error": "An internal server error occurred", "details": str(e)}), 500
+
+def caseIndexRemover(request, case_id):
+    with request_trace("ingest") as trace:
+        try:
+            if not _authorized(request):
+                trace["outcome"] = "invalid"
+                return jsonify({"error": "Invalid ingest token"}), 401
+
+            # only drops the case once the database agrees it is gone or no longer decided
+            result = ingest_case_ids([case_id])
+            return jsonify(dict(result, **index_status())), 200
+
+        except Exception as e:
+            trace["outcome"] = "error"
+            ERRORS.inc(stage="caseIndexRemover")
+            traceback.print_exc()
+            return jsonify({"error": "An internal server error occurred", "details": str(e)}), 500
+
+def caseIndexStatus():
+    return jsonify(index_status()), 200
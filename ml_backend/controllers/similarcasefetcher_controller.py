@@ -1,30 +1,196 @@
-from flask import jsonify
-from utils.similarcasefetcher import find_similar_cases
-from utils.baildecider import decide_bail
-from utils.aiassistancegenerator import generate_ai_assistance
+import os
+import json
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import Response, jsonify, stream_with_context
+from utils.similarcasefetcher import find_similar_cases, find_similar_cases_batch, project_similar_cases
+from utils.assessments import find_precomputed_assessment
+from utils.baildecider import decide_bail, decide_bail_batch
+from utils.aiassistancegenerator import generate_ai_assistance, generate_ai_assistance_stream, build_fallback_assistance
+from utils.metrics import AI_FALLBACKS, ERRORS, request_trace, stage
 import traceback
 
+AI_ASSISTANCE_TIMEOUT_SECONDS = float(os.getenv("AI_ASSISTANCE_TIMEOUT_SECONDS", 12))
+AI_STREAM_IDLE_TIMEOUT_SECONDS = float(os.getenv("AI_STREAM_IDLE_TIMEOUT_SECONDS", 10))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 100))
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("AI_ASSISTANCE_WORKERS", 8)))
+
+_STREAM_END = object()
+
+def _await_ai_assistance(future, bail_decision_data, entity, deadline):
+    try:
+        with stage("llm_wait"):
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        AI_FALLBACKS.inc()
+        return build_fallback_assistance(bail_decision_data, entity)
+
 def similarCaseFetcher(request):
+    with request_trace("find_similar_cases") as trace:
+        try:
+            case_data = request.get_json()
+            if not case_data:
+                trace["outcome"] = "invalid"
+                return jsonify({"error": "Invalid JSON payload"}), 400
+
+            entity = case_data.get('entity')
+            case_points = case_data.get('casePoints', {})
+
+            with stage("precomputed_lookup"):
+                precomputed = find_precomputed_assessment(case_data)
+            if precomputed is not None:
+                bail_decision_data = precomputed["bailDecision"]
+            else:
+                with stage("decide_bail"):
+                    bail_decision_data = decide_bail(case_points)
+            deadline = time.monotonic() + AI_ASSISTANCE_TIMEOUT_SECONDS
+            ai_future = _executor.submit(generate_ai_assistance, bail_decision_data, entity)
+
+            if precomputed is not None:
+                similar_cases_data = project_similar_cases(precomputed["similarCases"], case_data.get('projection'))
+            else:
+                similar_cases_data = find_similar_cases(case_data, projection=case_data.get('projection'))
+            ai_assistance_text = _await_ai_assistance(ai_future, bail_decision_data, entity, deadline)
+
+            response_data = {
+                "similarCases": similar_cases_data,
+                "bailDecision": bail_decision_data,
+                "aiAssistance": ai_assistance_text
+            }
+
+            return jsonify(response_data), 200
+
+        except Exception as e:
+            trace["outcome"] = "error"
+            ERRORS.inc(stage="similarCaseFetcher")
+            traceback.print_exc()
+            return jsonify({"error": "An internal server error occurred", "details": str(e)}), 500
+
+def batchSimilarCaseFetcher(request):
+    with request_trace("batch") as trace:
+        try:
+            batch_data = request.get_json(silent=True)
+            if not isinstance(batch_data, dict) or not isinstance(batch_data.get('cases'), list):
+                trace["outcome"] = "invalid"
+                return jsonify({"error": "Invalid JSON payload, expected a 'cases' list"}), 400
+
+            cases_data = [case for case in batch_data['cases'] if isinstance(case, dict)]
+            if len(cases_data) > MAX_BATCH_SIZE:
+                trace["outcome"] = "invalid"
+                return jsonify({"error": f"A batch can contain at most {MAX_BATCH_SIZE} cases"}), 400
+
+            top_k = batch_data.get('topK', 5)
+            if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+                trace["outcome"] = "invalid"
+                return jsonify({"error": "'topK' must be a positive integer"}), 400
+
+            default_entity = batch_data.get('entity')
+            include_ai_assistance = bool(batch_data.get('includeAiAssistance', False))
+
+            with stage("decide_bail"):
+                bail_decisions = decide_bail_batch([case.get('casePoints', {}) for case in cases_data])
+            entities = [case.get('entity', default_entity) for case in cases_data]
+
+            deadline = time.monotonic() + AI_ASSISTANCE_TIMEOUT_SECONDS
+            ai_futures = []
+            if include_ai_assistance:
+                ai_futures = [_executor.submit(generate_ai_assistance, decision, entity)
+                              for decision, entity in zip(bail_decisions, entities)]
+
+            similar_cases = find_similar_cases_batch(cases_data, batch_data.get('semanticScorer'), top_k,
+                                                     batch_data.get('candidateMode'), batch_data.get('projection'))
+
+            results = []
+            for position, case in enumerate(cases_data):
+                result = {
+                    "caseId": case.get('caseId'),
+                    "similarCases": similar_cases[position],
+                    "bailDecision": bail_decisions[position]
+                }
+                if include_ai_assistance:
+                    result["aiAssistance"] = _await_ai_assistance(ai_futures[position], bail_decisions[position], entities[position], deadline)
+                results.append(result)
+
+            return jsonify({"results": results}), 200
+
+        except Exception as e:
+            trace["outcome"] = "error"
+            ERRORS.inc(stage="batchSimilarCaseFetcher")
+            traceback.print_exc()
+            return jsonify({"error": "An internal server error occurred", "details": str(e)}), 500
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _pump_stream(chunks, sink):
     try:
-        case_data = request.get_json()
-        if not case_data:
-            return jsonify({"error": "Invalid JSON payload"}), 400
+        for chunk in chunks:
+            sink.put(chunk)
+    finally:
+        sink.put(_STREAM_END)
+
+def similarCaseStreamer(request):
+    case_data = request.get_json(silent=True)
+    if not case_data:
+        return jsonify({"error": "Invalid JSON payload"}), 400
+
+    entity = case_data.get('entity')
+    case_points = case_data.get('casePoints', {})
+
+    def generate():
+        with request_trace("stream") as trace:
+            try:
+                with stage("precomputed_lookup"):
+                    precomputed = find_precomputed_assessment(case_data)
+                if precomputed is not None:
+                    bail_decision_data = precomputed["bailDecision"]
+                else:
+                    with stage("decide_bail"):
+                        bail_decision_data = decide_bail(case_points)
+                yield _sse_event("bailDecision", bail_decision_data)
 
-        entity = case_data.get('entity')
-        case_points = case_data.get('casePoints', {})
+                deadline = time.monotonic() + AI_ASSISTANCE_TIMEOUT_SECONDS
+                ai_chunks = queue.Queue()
+                _executor.submit(_pump_stream, generate_ai_assistance_stream(bail_decision_data, entity), ai_chunks)
 
-        similar_cases_data = find_similar_cases(case_data)
-        bail_decision_data = decide_bail(case_points)
-        ai_assistance_text = generate_ai_assistance(bail_decision_data, entity)
+                if precomputed is not None:
+                    similar_cases_data = project_similar_cases(precomputed["similarCases"], case_data.get('projection'))
+                else:
+                    similar_cases_data = find_similar_cases(case_data, projection=case_data.get('projection'))
+                yield _sse_event("similarCases", similar_cases_data)
 
-        response_data = {
-            "similarCases": similar_cases_data,
-            "bailDecision": bail_decision_data,
-            "aiAssistance": ai_assistance_text
-        }
+                # the deadline only bounds the wait for the first chunk, a stream that has started
+                # is cut off only once it stalls for longer than the idle timeout
+                received_any = False
+                truncated = False
+                while True:
+                    timeout = AI_STREAM_IDLE_TIMEOUT_SECONDS if received_any else max(0.0, deadline - time.monotonic())
+                    try:
+                        with stage("llm_wait"):
+                            chunk = ai_chunks.get(timeout=timeout)
+                    except queue.Empty:
+                        if received_any:
+                            truncated = True
+                        else:
+                            AI_FALLBACKS.inc()
+                            yield _sse_event("aiAssistance", {"text": build_fallback_assistance(bail_decision_data, entity), "fallback": True})
+                        break
+                    if chunk is _STREAM_END:
+                        break
+                    received_any = True
+                    yield _sse_event("aiAssistance", {"text": chunk})
 
-        return jsonify(response_data), 200
+                yield _sse_event("done", {"truncated": True} if truncated else {})
+            except Exception as e:
+                trace["outcome"] = "error"
+                ERRORS.inc(stage="similarCaseStreamer")
+                traceback.print_exc()
+                yield _sse_event("error", {"error": "An internal server error occurred", "details": str(e)})
 
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify({"error": "An internal server error occurred", "details": str(e)}), 500
\ No newline at end of file
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
\ No newline at end of file
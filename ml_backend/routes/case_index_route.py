@@ -0,0 +1,16 @@
+from flask import Blueprint, request
+from controllers.caseindex_controller import caseIndexIngester, caseIndexRemover, caseIndexStatus
+
+case_index_bp = Blueprint('case_index_bp', __name__)
+
+@case_index_bp.route('/', methods=['GET'], strict_slashes=False)
+def case_index_status_route():
+    return caseIndexStatus()
+
+@case_index_bp.route('/cases', methods=['POST'])
+def case_index_ingest_route():
+    return caseIndexIngester(request)
+
+@case_index_bp.route('/cases/<case_id>', methods=['DELETE'])
+def case_index_remove_route(case_id):
+    return caseIndexRemover(request, case_id)
@@ -1,8 +1,16 @@
 from flask import Blueprint, request
-from controllers.similarcasefetcher_controller import similarCaseFetcher
+from controllers.similarcasefetcher_controller import similarCaseFetcher, similarCaseStreamer, batchSimilarCaseFetcher
 
 similar_case_bp = Blueprint('similar_case_bp', __name__)
 
 @similar_case_bp.route('/', methods=['POST'], strict_slashes=False)
 def process_case_judge_route():
-    return similarCaseFetcher(request)
\ No newline at end of file
+    return similarCaseFetcher(request)
+
+@similar_case_bp.route('/stream', methods=['POST'])
+def process_case_stream_route():
+    return similarCaseStreamer(request)
+
+@similar_case_bp.route('/batch', methods=['POST'])
+def process_case_batch_route():
+    return batchSimilarCaseFetcher(request)
\ No newline at end of file
@@ -0,0 +1,48 @@
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.baildecider import (
+    BAIL_RULES, DECISION_THRESHOLDS, FEATURE_NAMES, backtest_bail_rules, load_backtest_corpus, with_rule_weights
+)
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def _weight(value):
+    name, _, weight = value.partition('=')
+    if name not in FEATURE_NAMES or not weight:
+        raise argparse.ArgumentTypeError(f"expected <predicate>=<weight> with predicate in {', '.join(FEATURE_NAMES)}")
+    return name, int(weight)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score recorded Accepted/Declined cases with the bail rule table.")
+    parser.add_argument("--deny-at", type=_int_list, default=[DECISION_THRESHOLDS["deny_at"]],
+                        help="comma separated deny thresholds to sweep")
+    parser.add_argument("--grant-at", type=_int_list, default=[DECISION_THRESHOLDS["grant_at"]],
+                        help="comma separated grant thresholds to sweep")
+    parser.add_argument("--weight", type=_weight, action="append", default=[],
+                        help="override a rule weight, e.g. --weight isHeinous=25")
+    args = parser.parse_args()
+
+    from utils.servicecontext import get_case_collection
+
+    corpus = load_backtest_corpus(get_case_collection())
+    rules = with_rule_weights(dict(args.weight), BAIL_RULES) if args.weight else BAIL_RULES
+
+    results = [
+        backtest_bail_rules(corpus, rules, {"deny_at": deny_at, "grant_at": grant_at})
+        for deny_at in args.deny_at
+        for grant_at in args.grant_at
+    ]
+    print(json.dumps({"weights": dict(args.weight), "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
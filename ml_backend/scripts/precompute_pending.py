@@ -0,0 +1,131 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# the index is refreshed explicitly once per pass, so it matches the corpus tag taken at the start of the pass,
+# and the workers are the parallelism, so scoring must not fork shards of its own
+os.environ["CASE_INDEX_REFRESH_SECONDS"] = "inf"
+os.environ["CASE_INDEX_FULL_REFRESH_SECONDS"] = "inf"
+os.environ["SIMILARITY_SHARDS"] = "0"
+
+from utils.assessments import PENDING_PROJECTION, PENDING_STATUSES, assessment_document, corpus_tag, input_digest
+from utils.baildecider import decide_bail_batch
+from utils.servicecontext import get_assessment_collection, get_case_collection
+import utils.similarcasefetcher as similarcasefetcher
+
+
+def _assess(cases, semantic_scorer, top_k, candidate_mode):
+    similar_cases = similarcasefetcher.find_similar_cases_batch(cases, semantic_scorer, top_k, candidate_mode)
+    bail_decisions = decide_bail_batch([case.get("casePoints") or {} for case in cases])
+    return list(zip(cases, similar_cases, bail_decisions))
+
+
+def _pending_batches(collection, assessments, current, batch_size, recompute, stats):
+    # caseId order keeps passes deterministic, already current assessments are what makes a pass resumable
+    cursor = collection.find({"bailStatus": {"$in": PENDING_STATUSES}}, PENDING_PROJECTION,
+                             batch_size=batch_size).sort("caseId", 1)
+    batch = []
+    for case in cursor:
+        if case.get("caseId"):
+            batch.append(case)
+        if len(batch) == batch_size:
+            yield _unassessed(batch, assessments, current, recompute, stats)
+            batch = []
+    if batch:
+        yield _unassessed(batch, assessments, current, recompute, stats)
+
+
+def _unassessed(batch, assessments, current, recompute, stats):
+    stats["pending"] += len(batch)
+    if recompute:
+        return batch
+    digests = {
+        assessment["caseId"]: assessment.get("inputDigest")
+        for assessment in assessments.find(dict(current, caseId={"$in": [case["caseId"] for case in batch]}),
+                                           {"_id": 0, "caseId": 1, "inputDigest": 1})
+    }
+    fresh = [case for case in batch if digests.get(case["caseId"]) != input_digest(case)]
+    stats["skipped"] += len(batch) - len(fresh)
+    return fresh
+
+
+def _write(assessments, results, tag, semantic_scorer, top_k, candidate_mode):
+    from pymongo import UpdateOne
+
+    operations = [
+        UpdateOne({"caseId": case["caseId"]},
+                  {"$set": assessment_document(case, tag, similar, decision, semantic_scorer, top_k, candidate_mode)},
+                  upsert=True)
+        for case, similar, decision in results
+    ]
+    if operations:
+        assessments.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def run_pass(args):
+    started = time.perf_counter()
+    collection = get_case_collection()
+    # tagged before the refresh: a ruling landing in between leaves these assessments stale, never wrongly current
+    tag = corpus_tag(collection)
+    similarcasefetcher._refresh_case_index(force=True)
+    semantic_scorer = similarcasefetcher._resolve_semantic_scorer(args.semantic_scorer)
+    candidate_mode = similarcasefetcher._resolve_candidate_mode(args.candidate_mode)
+    if semantic_scorer == "tfidf":
+        similarcasefetcher._get_tfidf_model()
+    if candidate_mode == "lsh":
+        similarcasefetcher._get_lsh_index()
+
+    assessments = get_assessment_collection()
+    assessments.create_index("caseId", unique=True)
+    current = {"corpusTag": tag, "semanticScorer": semantic_scorer, "topK": args.top_k, "candidateMode": candidate_mode}
+    stats = dict(current, decidedCases=len(similarcasefetcher.case_index), pending=0, skipped=0, written=0)
+
+    # forked after the index is warm, so workers share its pages instead of each featurizing the corpus
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as pool:
+        in_flight = set()
+        for batch in _pending_batches(collection, assessments, current, args.batch_size, args.recompute, stats):
+            if batch:
+                in_flight.add(pool.submit(_assess, batch, semantic_scorer, args.top_k, candidate_mode))
+            while len(in_flight) >= args.workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats["written"] += _write(assessments, future.result(), tag, semantic_scorer, args.top_k, candidate_mode)
+        for future in in_flight:
+            stats["written"] += _write(assessments, future.result(), tag, semantic_scorer, args.top_k, candidate_mode)
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute similar cases and bail assessments for every pending case.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=50, help="pending cases scored per worker task")
+    parser.add_argument("--semantic-scorer", default=None, choices=list(similarcasefetcher.SEMANTIC_SCORERS),
+                        help="defaults to $SEMANTIC_SCORER, must match what the service resolves to be served")
+    parser.add_argument("--candidate-mode", default=None, choices=list(similarcasefetcher.CANDIDATE_MODES),
+                        help="defaults to $SIMILARITY_CANDIDATE_MODE")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--recompute", action="store_true", help="rescore cases whose assessment is already current")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="keep running, starting a new pass this many seconds after the previous one finished")
+    args = parser.parse_args()
+
+    while True:
+        print(json.dumps(run_pass(args)), flush=True)
+        if args.interval <= 0:
+            return
+        args.recompute = False
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
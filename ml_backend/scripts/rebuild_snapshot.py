@@ -0,0 +1,71 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.caseindex import CaseFeatureIndex
+from utils.similarcasefetcher import CaseFeatures
+from utils.snapshot import (
+    SnapshotError, load_snapshot, read_snapshot_metadata, snapshot_is_current, write_snapshot
+)
+
+
+def _describe(path, metadata):
+    return {
+        "path": path,
+        "cases": metadata["caseCount"],
+        "vocabulary": len(metadata["vocabulary"]),
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(metadata["createdAt"])),
+        "bytes": os.path.getsize(path),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the memory-mapped case index snapshot from the cases collection.")
+    parser.add_argument("--output", default=os.getenv("CASE_INDEX_SNAPSHOT", "case_index.snap"),
+                        help="snapshot path, defaults to $CASE_INDEX_SNAPSHOT")
+    parser.add_argument("--full", action="store_true", help="featurize every case instead of updating the existing snapshot")
+    parser.add_argument("--if-stale", action="store_true",
+                        help="skip the rebuild when the snapshot already matches the corpus count and latest updatedAt")
+    parser.add_argument("--verify", action="store_true", help="only check the existing snapshot's checksum and featurizer")
+    args = parser.parse_args()
+
+    if args.verify:
+        try:
+            print(json.dumps(_describe(args.output, read_snapshot_metadata(args.output, verify=True)), indent=2))
+        except (OSError, SnapshotError) as e:
+            print(f"Snapshot {args.output} is not usable: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    from utils.servicecontext import get_case_collection
+
+    collection = get_case_collection()
+    index = CaseFeatureIndex(CaseFeatures, refresh_interval=math.inf, full_refresh_interval=math.inf)
+    started = time.perf_counter()
+
+    reused = 0
+    if not args.full and os.path.exists(args.output):
+        try:
+            metadata = load_snapshot(args.output, index)
+            reused = metadata["caseCount"]
+        except (OSError, ValueError, KeyError, SnapshotError) as e:
+            print(f"Rebuilding from scratch, existing snapshot is not usable: {e}", file=sys.stderr)
+        else:
+            if args.if_stale and snapshot_is_current(metadata, collection):
+                print(json.dumps(dict(_describe(args.output, metadata), skipped=True), indent=2))
+                return
+
+    index.refresh(collection, force=True)
+    written = write_snapshot(args.output, index)
+    print(json.dumps(dict(_describe(args.output, read_snapshot_metadata(args.output)),
+                          written=written, loadedFromPreviousSnapshot=reused,
+                          seconds=round(time.perf_counter() - started, 2)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import gc
+import logging
+import multiprocessing
+import os
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from gunicorn.app.base import BaseApplication
+
+logger = logging.getLogger("jurisdict.serve")
+
+
+class JurisdictApplication(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from app import app
+        from utils.similarcasefetcher import warm_case_index
+
+        try:
+            indexed = warm_case_index()
+            logger.warning("Preloaded %d decided cases before forking workers", indexed)
+        except Exception:
+            logger.exception("Could not preload the case index, workers will build it on first use")
+
+        # keep the preloaded objects out of the collector so workers do not dirty the shared pages
+        gc.freeze()
+        return app
+
+
+def build_options():
+    return {
+        "bind": f"0.0.0.0:{int(os.getenv('PORT', 5001))}",
+        "workers": int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count())),
+        "worker_class": os.getenv("GUNICORN_WORKER_CLASS", "gthread"),
+        "threads": int(os.getenv("GUNICORN_THREADS", 4)),
+        "backlog": int(os.getenv("GUNICORN_BACKLOG", 2048)),
+        "timeout": int(os.getenv("GUNICORN_TIMEOUT", 60)),
+        "keepalive": int(os.getenv("GUNICORN_KEEPALIVE", 5)),
+        "max_requests": int(os.getenv("GUNICORN_MAX_REQUESTS", 0)),
+        "max_requests_jitter": int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 0)),
+        "preload_app": True,
+        "accesslog": os.getenv("GUNICORN_ACCESS_LOG", "-"),
+    }
+
+
+if __name__ == '__main__':
+    JurisdictApplication(build_options()).run()
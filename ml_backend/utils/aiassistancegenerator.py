@@ -1,17 +1,54 @@
 import os
-import google.generativeai as genai
+import hashlib
+import threading
+from utils.lrucache import LRUCache
+from utils.servicecontext import get_genai
+from utils.metrics import ERRORS, stage
 
-def generate_ai_assistance(bail_decision_data, entity):
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        return "Error: GEMINI_API_KEY not found in environment variables."
+GEMINI_MODEL_NAME = 'gemini-2.5-flash'
 
-    try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash')
-    except Exception as e:
-        return f"Error configuring AI model: {str(e)}"
+_response_cache = LRUCache(
+    maxsize=int(os.getenv("AI_CACHE_MAXSIZE", 256)),
+    ttl=float(os.getenv("AI_CACHE_TTL_SECONDS", 6 * 60 * 60))
+)
 
+_model = None
+_model_api_key = None
+_model_lock = threading.Lock()
+
+def _outlook_summary(decision):
+    if decision == "Grant Bail":
+        return "leaning favorably, though subject to judicial review."
+    elif decision == "Deny Bail":
+        return "presenting significant challenges."
+    return "a complex matter with multiple factors under consideration."
+
+def build_fallback_assistance(bail_decision_data, entity):
+    decision = bail_decision_data.get('decision', 'N/A')
+    reasoning = bail_decision_data.get('reasoning', {})
+    red_flags = reasoning.get('red_flags', [])
+    green_flags = reasoning.get('green_flags', [])
+
+    if entity == 'judge':
+        adverse_factors = "\n- ".join(red_flags) if red_flags else "None"
+        favorable_factors = "\n- ".join(green_flags) if green_flags else "None"
+        return (
+            f"**Bail Assessment Outcome:** {decision}\n\n"
+            f"**Factors Weighing Against Bail:**\n- {adverse_factors}\n\n"
+            f"**Factors Weighing in Favour of Bail:**\n- {favorable_factors}\n\n"
+            "The detailed AI summary is not available right now; this overview lists the assessment factors as computed."
+        )
+    elif entity == 'lawyer':
+        return (
+            f"The preliminary computational analysis indicates the bail outlook is '{decision}'. "
+            f"The case is considered {_outlook_summary(decision)} This is a computational tool and not a substitute for legal strategy."
+        )
+    return (
+        f"A preliminary analysis of the case details has been completed. The initial assessment is that the situation is {_outlook_summary(decision)} "
+        "Please understand this is not a final judicial decision."
+    )
+
+def _build_prompt(bail_decision_data, entity):
     decision = bail_decision_data.get('decision', 'N/A')
     reasoning = bail_decision_data.get('reasoning', {})
     red_flags = reasoning.get('red_flags', [])
@@ -31,11 +68,7 @@ def generate_ai_assistance(bail_decision_data, entity):
             "**Detailed Judicial Summary:**"
         )
     else:
-        vague_summary = "a complex matter with multiple factors under consideration."
-        if decision == "Grant Bail":
-            vague_summary = "leaning favorably, though subject to judicial review."
-        elif decision == "Deny Bail":
-            vague_summary = "presenting significant challenges."
+        vague_summary = _outlook_summary(decision)
         
         if entity == 'lawyer':
             prompt = (
@@ -50,8 +83,83 @@ def generate_ai_assistance(bail_decision_data, entity):
                 "Please understand this is not a final judicial decision."
             )
 
+    return prompt
+
+def _get_model(api_key):
+    global _model, _model_api_key
+    with _model_lock:
+        if _model is None or _model_api_key != api_key:
+            genai = get_genai()
+            genai.configure(api_key=api_key)
+            _model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+            _model_api_key = api_key
+        return _model
+
+def _cache_key(entity, prompt):
+    return hashlib.sha256(f"{entity}\x00{prompt}".encode()).hexdigest()
+
+def get_ai_cache_stats():
+    return _response_cache.stats()
+
+def generate_ai_assistance(bail_decision_data, entity):
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return "Error: GEMINI_API_KEY not found in environment variables."
+
+    prompt = _build_prompt(bail_decision_data, entity)
+    cache_key = _cache_key(entity, prompt)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        model = _get_model(api_key)
+    except Exception as e:
+        ERRORS.inc(stage="llm")
+        return f"Error configuring AI model: {str(e)}"
+
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        with stage("llm"):
+            response = model.generate_content(prompt)
+            text = response.text
     except Exception as e:
-        return f"An unexpected error occurred while communicating with the AI service: {str(e)}"
\ No newline at end of file
+        ERRORS.inc(stage="llm")
+        return f"An unexpected error occurred while communicating with the AI service: {str(e)}"
+
+    _response_cache.set(cache_key, text)
+    return text
+
+def generate_ai_assistance_stream(bail_decision_data, entity):
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        yield "Error: GEMINI_API_KEY not found in environment variables."
+        return
+
+    prompt = _build_prompt(bail_decision_data, entity)
+    cache_key = _cache_key(entity, prompt)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    try:
+        model = _get_model(api_key)
+    except Exception as e:
+        ERRORS.inc(stage="llm")
+        yield f"Error configuring AI model: {str(e)}"
+        return
+
+    chunks = []
+    try:
+        with stage("llm"):
+            for chunk in model.generate_content(prompt, stream=True):
+                text = chunk.text
+                if text:
+                    chunks.append(text)
+                    yield text
+    except Exception as e:
+        ERRORS.inc(stage="llm")
+        yield f"An unexpected error occurred while communicating with the AI service: {str(e)}"
+        return
+
+    _response_cache.set(cache_key, "".join(chunks))
\ No newline at end of file
@@ -0,0 +1,111 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.metrics import PRECOMPUTED_LOOKUPS
+from utils.servicecontext import get_assessment_collection, get_case_collection
+from utils.similarcasefetcher import _resolve_candidate_mode, _resolve_semantic_scorer
+
+logger = logging.getLogger("jurisdict.assessments")
+
+PENDING_STATUSES = ["Pending to lawyer", "Pending to judge"]
+PRECOMPUTED_ASSESSMENTS = os.getenv("PRECOMPUTED_ASSESSMENTS", "").lower() in ("1", "true", "yes")
+CORPUS_TAG_TTL_SECONDS = float(os.getenv("PRECOMPUTED_CORPUS_TAG_TTL_SECONDS", 5))
+
+# every field find_similar_cases and decide_bail read, a change to any of them makes an assessment stale;
+# missing fields hash as their empty value, since Node sends {} where Mongo has no casePoints at all
+ASSESSMENT_INPUT_DEFAULTS = {
+    "caseId": "", "caseTitle": "", "caseSummary": "", "bnsSections": [], "groundsOfBail": [], "casePoints": {}
+}
+ASSESSMENT_INPUT_FIELDS = tuple(ASSESSMENT_INPUT_DEFAULTS)
+
+_corpus_tag_lock = threading.Lock()
+_corpus_tag = (None, 0.0)
+
+PENDING_PROJECTION = dict({"_id": 0, "bailStatus": 1}, **{field: 1 for field in ASSESSMENT_INPUT_FIELDS})
+
+
+def input_digest(case_data):
+    values = [case_data.get(field) for field in ASSESSMENT_INPUT_FIELDS]
+    material = json.dumps([value if value is not None else ASSESSMENT_INPUT_DEFAULTS[field]
+                           for field, value in zip(ASSESSMENT_INPUT_FIELDS, values)], sort_keys=True, default=str)
+    return hashlib.md5(material.encode()).hexdigest()
+
+
+def corpus_tag(collection):
+    # read from the database rather than any process's index, so the job and every worker agree on it
+    from utils.snapshot import _to_micros, corpus_fingerprint
+
+    count, latest = corpus_fingerprint(collection)
+    return f"{count}:{_to_micros(latest)}"
+
+
+def _current_corpus_tag():
+    global _corpus_tag
+    tag, read_at = _corpus_tag
+    if tag is not None and time.monotonic() - read_at < CORPUS_TAG_TTL_SECONDS:
+        return tag
+    with _corpus_tag_lock:
+        tag, read_at = _corpus_tag
+        if tag is None or time.monotonic() - read_at >= CORPUS_TAG_TTL_SECONDS:
+            tag = corpus_tag(get_case_collection())
+            _corpus_tag = (tag, time.monotonic())
+        return tag
+
+
+def assessment_document(case_data, tag, similar_cases, bail_decision, semantic_scorer, top_k, candidate_mode):
+    return {
+        "caseId": case_data.get("caseId"),
+        "corpusTag": tag,
+        "inputDigest": input_digest(case_data),
+        "semanticScorer": semantic_scorer,
+        "topK": top_k,
+        "candidateMode": candidate_mode,
+        "similarCases": similar_cases,
+        "bailDecision": bail_decision,
+        "computedAt": datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
+    }
+
+
+def find_precomputed_assessment(case_data, semantic_scorer=None, top_k=5, candidate_mode=None):
+    if not PRECOMPUTED_ASSESSMENTS or not case_data.get("caseId"):
+        return None
+    from pymongo.errors import PyMongoError
+
+    try:
+        assessment = get_assessment_collection().find_one({"caseId": case_data["caseId"]}, {"_id": 0})
+    except PyMongoError as e:
+        logger.warning("Could not read precomputed assessment for %s, scoring live: %s", case_data["caseId"], e)
+        PRECOMPUTED_LOOKUPS.inc(outcome="error")
+        return None
+
+    if assessment is None:
+        PRECOMPUTED_LOOKUPS.inc(outcome="missing")
+        return None
+    try:
+        tag = _current_corpus_tag()
+    except PyMongoError as e:
+        logger.warning("Could not read the corpus fingerprint, scoring %s live: %s", case_data["caseId"], e)
+        PRECOMPUTED_LOOKUPS.inc(outcome="error")
+        return None
+    current = (tag, input_digest(case_data), _resolve_semantic_scorer(semantic_scorer), top_k,
+               _resolve_candidate_mode(candidate_mode))
+    stored = tuple(assessment.get(field) for field in ("corpusTag", "inputDigest", "semanticScorer", "topK", "candidateMode"))
+    if stored != current:
+        PRECOMPUTED_LOOKUPS.inc(outcome="stale")
+        return None
+    PRECOMPUTED_LOOKUPS.inc(outcome="hit")
+    return assessment
+
+
+def _reset_after_fork():
+    global _corpus_tag_lock
+    _corpus_tag_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,126 +1,244 @@
-def decide_bail(case_points):
-    risk_score = 0
-    red_flags = []
-    green_flags = []
+from collections import namedtuple
+import numpy as np
+
+HEINOUS_SECTIONS = ["302", "307", "376", "395", "397"]
+ECONOMIC_SECTIONS = ["420", "406", "409", "468", "471"]
+SERIOUS_SECTIONS = ["326", "325", "363", "366", "392"]
+
+BailRule = namedtuple("BailRule", ["predicate", "weight", "flag"])
+
+# Rules inside a group are alternatives: only the first one whose predicate holds is applied.
+# Positive weights raise the risk score and produce red flags, negative ones produce green flags.
+BAIL_RULES = [
+    [
+        BailRule("isHeinous", 20, "The accused is charged with heinous crimes."),
+        BailRule("isEconomic", 15, "The case involves serious economic or financial crimes."),
+        BailRule("isSerious", 10, "The offense is of a serious nature causing significant harm."),
+        BailRule(None, 5, "The offense is of a minor nature."),
+    ],
+    [BailRule("hasStrongEvidence", 10, "The prosecution's evidence appears to be strong and multifaceted.")],
+    [
+        BailRule("hasSimilarPriorRecord", 15, "The accused has a history of similar offenses."),
+        BailRule("hasDifferentPriorRecord", 10, "The accused has a prior criminal record for different offenses."),
+    ],
+    [BailRule("isFlightRisk", 15, "There is a potential flight risk due to a valid passport and financial means.")],
+    [BailRule("witnessThreatReports", 20, "There is a credible risk of witness intimidation based on reports.")],
+    [BailRule("evidenceTamperingReports", 15, "There is a risk of evidence tampering based on reports.")],
+    [BailRule("allegedOrganizedCrimeLinks", 15, "The accused is allegedly part of an organized crime network.")],
+    [BailRule("historyOfViolence", 15, "The accused has a documented history of violent behavior.")],
+    [
+        BailRule("hasDeepCommunityRoots", -15, "The accused has deep roots in the community (property, job, family)."),
+        BailRule("hasSomeCommunityTies", -5, "The accused has some established ties to the community."),
+    ],
+    [BailRule("isFirstOffense", -10, "This is the accused's first alleged offense.")],
+    [BailRule("hasLongDetention", -10, "The accused has already undergone a significant period of incarceration.")],
+    [BailRule("hasMedicalConditions", -15, "The accused has documented health issues requiring special medical attention.")],
+    [BailRule("isSoleFamilyEarner", -5, "The accused is the sole financial provider for their family.")],
+    [BailRule("hasSecondaryRole", -10, "The accused's alleged role in the crime was minor.")],
+    [BailRule("hasMitigatingAge", -15, "The age of the accused (either young or elderly) is a mitigating factor.")],
+]
+
+DECISION_THRESHOLDS = {"deny_at": 20, "grant_at": 0}
+
+FEATURE_NAMES = sorted({rule.predicate for group in BAIL_RULES for rule in group if rule.predicate})
+
+
+def _extract_features(case_points):
+    def is_true(key):
+        return str(case_points.get(key, 'false')).lower() == 'true'
+
+    bns_sections = case_points.get("bnsSections", "").split(', ')
+    evidence = case_points.get("availableEvidence", "")
+    has_prior_record = is_true("hasPriorRecord")
+    prior_sections = set(case_points.get("priorConvictionSections", "").split(', '))
+    is_employed = is_true("isEmployed")
+    has_local_family = is_true("hasLocalFamily")
+    accused_age = int(case_points.get("accusedAge", 30))
+
+    return {
+        "isHeinous": any(sec in bns_sections for sec in HEINOUS_SECTIONS),
+        "isEconomic": any(sec in bns_sections for sec in ECONOMIC_SECTIONS),
+        "isSerious": any(sec in bns_sections for sec in SERIOUS_SECTIONS),
+        "hasStrongEvidence": len(evidence.split(', ')) > 2 and ("CCTV" in evidence or "DNA" in evidence or "confession" in evidence),
+        "hasSimilarPriorRecord": has_prior_record and not prior_sections.isdisjoint(bns_sections),
+        "hasDifferentPriorRecord": has_prior_record and prior_sections.isdisjoint(bns_sections),
+        "isFlightRisk": is_true("holdsPassport") and is_true("hasFinancialMeansToTravel"),
+        "witnessThreatReports": is_true("witnessThreatReports"),
+        "evidenceTamperingReports": is_true("evidenceTamperingReports"),
+        "allegedOrganizedCrimeLinks": is_true("allegedOrganizedCrimeLinks"),
+        "historyOfViolence": is_true("historyOfViolence"),
+        "hasDeepCommunityRoots": is_true("ownsProperty") and is_employed and has_local_family,
+        "hasSomeCommunityTies": is_employed or has_local_family,
+        "isFirstOffense": not has_prior_record,
+        "hasLongDetention": int(case_points.get("daysInDetention", 0)) > 180,
+        "hasMedicalConditions": case_points.get("medicalConditions", "None reported").lower() != "none reported",
+        "isSoleFamilyEarner": is_true("isSoleFamilyEarner"),
+        "hasSecondaryRole": "secondary" in case_points.get("allegedRoleInCrime", ""),
+        "hasMitigatingAge": accused_age < 21 or accused_age > 65,
+    }
+
+
+class CompiledBailRules:
+    def __init__(self, rules=BAIL_RULES, thresholds=DECISION_THRESHOLDS):
+        self.groups = [
+            (tuple(rule.predicate for rule in group), np.array([rule.weight for rule in group] + [0]), group)
+            for group in rules
+        ]
+        self.deny_at = thresholds["deny_at"]
+        self.grant_at = thresholds["grant_at"]
+
+    def decision_for(self, score):
+        if score >= self.deny_at:
+            return "Deny Bail"
+        elif score > self.grant_at:
+            return "Discretionary"
+        return "Grant Bail"
+
+    def evaluate(self, features):
+        risk_score = 0
+        red_flags = []
+        green_flags = []
+
+        for _, _, group in self.groups:
+            for rule in group:
+                if rule.predicate is None or features[rule.predicate]:
+                    risk_score += rule.weight
+                    (red_flags if rule.weight > 0 else green_flags).append(rule.flag)
+                    break
 
-    if not isinstance(case_points, dict):
         return {
-            "decision": "Error",
-            "score": 0,
+            "decision": self.decision_for(risk_score),
+            "score": risk_score,
             "reasoning": {
-                "red_flags": ["Invalid or missing casePoints data."],
-                "green_flags": []
+                "red_flags": red_flags,
+                "green_flags": green_flags
             }
         }
 
-    def is_true(key):
-        return str(case_points.get(key, 'false')).lower() == 'true'
+    def score_columns(self, columns, size):
+        scores = np.zeros(size, dtype=np.int64)
+        fired = np.empty((size, len(self.groups)), dtype=np.int64)
 
-    bns_sections = case_points.get("bnsSections", "").split(', ')
-    crime_type = case_points.get("crimeType", "")
-    heinous_crimes = ["302", "307", "376", "395", "397"]
-    economic_crimes = ["420", "406", "409", "468", "471"]
-    serious_crimes = ["326", "325", "363", "366", "392"]
-    
-    is_heinous = any(sec in bns_sections for sec in heinous_crimes)
-    is_economic = any(sec in bns_sections for sec in economic_crimes)
-    is_serious = any(sec in bns_sections for sec in serious_crimes)
-
-    if is_heinous:
-        risk_score += 20
-        red_flags.append("The accused is charged with heinous crimes.")
-    elif is_economic:
-        risk_score += 15
-        red_flags.append("The case involves serious economic or financial crimes.")
-    elif is_serious:
-        risk_score += 10
-        red_flags.append("The offense is of a serious nature causing significant harm.")
-    else:
-        risk_score += 5
-        red_flags.append("The offense is of a minor nature.")
+        for position, (predicates, weights, _) in enumerate(self.groups):
+            conditions = [np.ones(size, dtype=bool) if predicate is None else columns[predicate] for predicate in predicates]
+            choice = np.select(conditions, np.arange(len(predicates)), default=len(predicates))
+            scores += weights[choice]
+            fired[:, position] = choice
 
-    evidence = case_points.get("availableEvidence", "")
-    if len(evidence.split(', ')) > 2 and ("CCTV" in evidence or "DNA" in evidence or "confession" in evidence):
-        risk_score += 10
-        red_flags.append("The prosecution's evidence appears to be strong and multifaceted.")
-    
-    prior_conviction_sections = case_points.get("priorConvictionSections", "")
-    if is_true("hasPriorRecord"):
-        current_sections_set = set(bns_sections)
-        prior_sections_set = set(prior_conviction_sections.split(', '))
-        if not prior_sections_set.isdisjoint(current_sections_set):
-            risk_score += 15
-            red_flags.append("The accused has a history of similar offenses.")
-        else:
-            risk_score += 10
-            red_flags.append("The accused has a prior criminal record for different offenses.")
-
-    if is_true("holdsPassport") and is_true("hasFinancialMeansToTravel"):
-        risk_score += 15
-        red_flags.append("There is a potential flight risk due to a valid passport and financial means.")
-
-    if is_true("witnessThreatReports"):
-        risk_score += 20
-        red_flags.append("There is a credible risk of witness intimidation based on reports.")
-
-    if is_true("evidenceTamperingReports"):
-        risk_score += 15
-        red_flags.append("There is a risk of evidence tampering based on reports.")
-
-    if is_true("allegedOrganizedCrimeLinks"):
-        risk_score += 15
-        red_flags.append("The accused is allegedly part of an organized crime network.")
-    
-    if is_true("historyOfViolence"):
-        risk_score += 15
-        red_flags.append("The accused has a documented history of violent behavior.")
-
-    if is_true("ownsProperty") and is_true("isEmployed") and is_true("hasLocalFamily"):
-        risk_score -= 15
-        green_flags.append("The accused has deep roots in the community (property, job, family).")
-    elif is_true("isEmployed") or is_true("hasLocalFamily"):
-        risk_score -= 5
-        green_flags.append("The accused has some established ties to the community.")
-
-    if not is_true("hasPriorRecord"):
-        risk_score -= 10
-        green_flags.append("This is the accused's first alleged offense.")
-        
-    days_in_detention = int(case_points.get("daysInDetention", 0))
-    if days_in_detention > 180:
-        risk_score -= 10
-        green_flags.append("The accused has already undergone a significant period of incarceration.")
-
-    if case_points.get("medicalConditions", "None reported").lower() != "none reported":
-        risk_score -= 15
-        green_flags.append("The accused has documented health issues requiring special medical attention.")
-
-    if is_true("isSoleFamilyEarner"):
-        risk_score -= 5
-        green_flags.append("The accused is the sole financial provider for their family.")
-
-    if "secondary" in case_points.get("allegedRoleInCrime", ""):
-        risk_score -= 10
-        green_flags.append("The accused's alleged role in the crime was minor.")
+        return scores, fired
 
-    accused_age = int(case_points.get("accusedAge", 30))
-    if accused_age < 21 or accused_age > 65:
-        risk_score -= 15
-        green_flags.append("The age of the accused (either young or elderly) is a mitigating factor.")
-
-    decision = ""
-    if risk_score >= 20:
-        decision = "Deny Bail"
-    elif risk_score > 0 and risk_score < 20:
-        decision = "Discretionary"
-    else:
-        decision = "Grant Bail"
-    
+    def decisions_for(self, scores):
+        return np.where(scores >= self.deny_at, "Deny Bail",
+                        np.where(scores > self.grant_at, "Discretionary", "Grant Bail"))
+
+    def reasoning_for(self, fired_row):
+        red_flags = []
+        green_flags = []
+        for (_, _, group), choice in zip(self.groups, fired_row):
+            if choice < len(group):
+                rule = group[choice]
+                (red_flags if rule.weight > 0 else green_flags).append(rule.flag)
+        return {"red_flags": red_flags, "green_flags": green_flags}
+
+
+_default_rules = CompiledBailRules()
+
+
+def _invalid_case_points_result():
     return {
-        "decision": decision,
-        "score": risk_score,
+        "decision": "Error",
+        "score": 0,
         "reasoning": {
-            "red_flags": red_flags,
-            "green_flags": green_flags
+            "red_flags": ["Invalid or missing casePoints data."],
+            "green_flags": []
+        }
+    }
+
+
+def extract_feature_columns(case_points_list, skip_invalid=False):
+    rows = []
+    kept = []
+    for position, case_points in enumerate(case_points_list):
+        if not isinstance(case_points, dict):
+            continue
+        try:
+            rows.append(_extract_features(case_points))
+        except (AttributeError, TypeError, ValueError):
+            if not skip_invalid:
+                raise
+            continue
+        kept.append(position)
+
+    columns = {name: np.fromiter((row[name] for row in rows), dtype=bool, count=len(rows)) for name in FEATURE_NAMES}
+    return columns, kept
+
+
+def decide_bail(case_points):
+    if not isinstance(case_points, dict):
+        return _invalid_case_points_result()
+
+    return _default_rules.evaluate(_extract_features(case_points))
+
+
+def decide_bail_batch(case_points_list, rules=None):
+    rules = rules or _default_rules
+    # one malformed case gets the invalid result instead of failing every other case in the batch
+    columns, kept = extract_feature_columns(case_points_list, skip_invalid=True)
+    scores, fired = rules.score_columns(columns, len(kept))
+    decisions = rules.decisions_for(scores)
+
+    results = [_invalid_case_points_result() for _ in case_points_list]
+    for row, position in enumerate(kept):
+        results[position] = {
+            "decision": str(decisions[row]),
+            "score": int(scores[row]),
+            "reasoning": rules.reasoning_for(fired[row])
+        }
+    return results
+
+
+def load_backtest_corpus(collection):
+    outcomes = []
+    case_points_list = []
+    for case in collection.find({"bailStatus": {"$in": ["Accepted", "Declined"]}}, {"_id": 0, "bailStatus": 1, "casePoints": 1}):
+        outcomes.append(case.get("bailStatus"))
+        case_points_list.append(case.get("casePoints"))
+
+    columns, kept = extract_feature_columns(case_points_list, skip_invalid=True)
+    return {
+        "columns": columns,
+        "outcomes": np.array([outcomes[position] for position in kept], dtype=object),
+        "skipped": len(outcomes) - len(kept)
+    }
+
+
+def with_rule_weights(weights, rules=BAIL_RULES):
+    return [[rule._replace(weight=weights.get(rule.predicate, rule.weight)) for rule in group] for group in rules]
+
+
+def backtest_bail_rules(corpus, rules=BAIL_RULES, thresholds=DECISION_THRESHOLDS):
+    compiled = CompiledBailRules(rules, thresholds)
+    recorded = corpus["outcomes"]
+    scores, _ = compiled.score_columns(corpus["columns"], len(recorded))
+    decisions = compiled.decisions_for(scores)
+
+    confusion = {
+        outcome: {decision: int(np.sum((recorded == outcome) & (decisions == decision)))
+                  for decision in ("Grant Bail", "Discretionary", "Deny Bail")}
+        for outcome in ("Accepted", "Declined")
+    }
+    agreed = confusion["Accepted"]["Grant Bail"] + confusion["Declined"]["Deny Bail"]
+    decisive = agreed + confusion["Accepted"]["Deny Bail"] + confusion["Declined"]["Grant Bail"]
+
+    return {
+        "scored": len(recorded),
+        "skipped": corpus["skipped"],
+        "thresholds": dict(thresholds),
+        "confusion": confusion,
+        "discretionary": confusion["Accepted"]["Discretionary"] + confusion["Declined"]["Discretionary"],
+        "agreementRate": round(agreed / decisive, 4) if decisive else 0.0,
+        "meanScore": {
+            outcome: round(float(scores[recorded == outcome].mean()), 2) if np.any(recorded == outcome) else None
+            for outcome in ("Accepted", "Declined")
         }
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,310 @@
+import bisect
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+DECIDED_STATUSES = ["Accepted", "Declined"]
+
+CASE_PROJECTION = {
+    "_id": 0, "caseId": 1, "caseTitle": 1, "caseSummary": 1,
+    "bnsSections": 1, "groundsOfBail": 1, "bailStatus": 1, "courtName": 1, "updatedAt": 1
+}
+
+SUMMARY_EXCERPT_CHARS = int(os.getenv("CASE_SUMMARY_EXCERPT_CHARS", 280))
+RECORD_FIELDS = ("caseTitle", "courtName", "bnsSections", "summaryExcerpt")
+
+FETCH_BATCH_SIZE = 500
+CHANGE_LOG_SIZE = int(os.getenv("CASE_INDEX_CHANGE_LOG_SIZE", 4096))
+
+
+def _summary_excerpt(summary):
+    if SUMMARY_EXCERPT_CHARS <= 0:
+        return ""
+    summary = " ".join(str(summary or "").split())
+    if len(summary) <= SUMMARY_EXCERPT_CHARS:
+        return summary
+    cut = summary.rfind(" ", 0, SUMMARY_EXCERPT_CHARS + 1)
+    return summary[:cut if cut > 0 else SUMMARY_EXCERPT_CHARS].rstrip(" ,;:.") + "…"
+
+
+def case_record(case):
+    # the display fields similar-case results can carry, court names repeat across cases so they are interned
+    return (
+        str(case.get("caseTitle") or ""),
+        sys.intern(str(case.get("courtName") or "")),
+        tuple(str(section) for section in case.get("bnsSections") or ()),
+        _summary_excerpt(case.get("caseSummary")),
+    )
+
+
+class CaseFeatureIndex:
+    def __init__(self, featurize, refresh_interval=None, full_refresh_interval=None):
+        self._featurize = featurize
+        self._features = {}
+        self._updated_at = {}
+        self._ordinals = {}
+        self._records = {}
+        self._next_ordinal = 0
+        self._postings = {}
+        self._section_entries = []
+        self.lsh = None
+        self.tfidf = None
+        self.version = 0
+        self._changes = deque(maxlen=CHANGE_LOG_SIZE)
+        self._changes_floor = 0
+        self._watermark = None
+        self._last_refresh = None
+        self._last_full_refresh = None
+        self._lock = threading.RLock()
+        if refresh_interval is None:
+            refresh_interval = float(os.getenv("CASE_INDEX_REFRESH_SECONDS", 30))
+        if full_refresh_interval is None:
+            full_refresh_interval = float(os.getenv("CASE_INDEX_FULL_REFRESH_SECONDS", 600))
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+
+    def __len__(self):
+        return len(self._features)
+
+    @property
+    def is_warm(self):
+        return self._last_refresh is not None
+
+    def get(self, case_id):
+        return self._features.get(case_id)
+
+    def record(self, case_id):
+        record = self._records.get(case_id)
+        features = self._features.get(case_id)
+        if record is None or features is None:
+            return None
+        return dict(zip(RECORD_FIELDS, record), bailStatus=features.bail_status)
+
+    def cases(self):
+        with self._lock:
+            return list(self._features.values())
+
+    def candidates(self, terms, case_ids=()):
+        # (ordinal, features) pairs captured under the lock, so scoring never reads index state a writer may change
+        with self._lock:
+            matched = set(case_id for case_id in case_ids if case_id in self._features)
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting:
+                    matched.update(posting)
+            ordinals = self._ordinals
+            features = self._features
+            return sorted((ordinals[case_id], features[case_id]) for case_id in matched)
+
+    def attach_lsh(self, lsh):
+        with self._lock:
+            for case_id, features in self._features.items():
+                lsh.add(case_id, features.token_strings())
+            self.lsh = lsh
+        return lsh
+
+    def attach_tfidf(self, tfidf):
+        with self._lock:
+            for case_id, features in self._features.items():
+                tfidf.add(case_id, features)
+            self.tfidf = tfidf
+        return tfidf
+
+    def changes_since(self, version):
+        # case ids touched after `version`, or None once the bounded log no longer reaches back that far
+        with self._lock:
+            if version < self._changes_floor:
+                return None
+            return list(dict.fromkeys(case_id for changed_at, case_id in self._changes if changed_at > version))
+
+    def _record_change(self, case_id):
+        self.version += 1
+        if len(self._changes) == self._changes.maxlen:
+            self._changes_floor = self._changes[0][0]
+        self._changes.append((self.version, case_id))
+
+    def request_full_refresh(self):
+        with self._lock:
+            self._last_full_refresh = None
+            if self._last_refresh is not None:
+                self._last_refresh = -math.inf
+
+    def posting(self, term):
+        with self._lock:
+            return tuple(self._postings.get(term, ()))
+
+    def posting_size(self, term):
+        return len(self._postings.get(term, ()))
+
+    def sections_in_range(self, low, high):
+        with self._lock:
+            entries = self._section_entries
+            start = bisect.bisect_left(entries, (low,))
+            end = bisect.bisect_left(entries, (high + 1,))
+            return entries[start:end]
+
+    def section_entries(self):
+        with self._lock:
+            return list(self._section_entries)
+
+    def refresh(self, collection, force=False):
+        now = time.monotonic()
+        if not force and self._last_refresh is not None and now - self._last_refresh < self.refresh_interval:
+            return False
+
+        with self._lock:
+            if self._last_full_refresh is None or now - self._last_full_refresh >= self.full_refresh_interval:
+                changed = self._full_refresh(collection)
+                self._last_full_refresh = now
+            else:
+                changed = self._incremental_refresh(collection)
+            self._last_refresh = now
+            return changed
+
+    def upsert(self, case, advance_watermark=True):
+        case_id = case.get("caseId")
+        if not case_id:
+            return False
+        if case.get("bailStatus") not in DECIDED_STATUSES:
+            return self.remove(case_id)
+
+        with self._lock:
+            updated_at = case.get("updatedAt")
+            # a case pushed ahead of the poll is already current, but the poll still has to move the watermark past it
+            if advance_watermark:
+                self._advance_watermark(updated_at)
+            if case_id in self._features and self._updated_at.get(case_id) == updated_at and updated_at is not None:
+                return False
+            features = self._featurize(case)
+            self._unindex(case_id)
+            self.load(case_id, features, updated_at, self._next_ordinal)
+            self._records[case_id] = case_record(case)
+            self._record_change(case_id)
+            return True
+
+    def _advance_watermark(self, updated_at):
+        if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+
+    def load(self, case_id, features, updated_at, ordinal):
+        with self._lock:
+            self._features[case_id] = features
+            self._updated_at[case_id] = updated_at
+            self._ordinals[case_id] = ordinal
+            self._next_ordinal = max(self._next_ordinal, ordinal + 1)
+            for term in features.index_terms():
+                self._postings.setdefault(term, set()).add(case_id)
+            for section, number in features.section_numbers:
+                bisect.insort(self._section_entries, (number, case_id, section))
+            if self.lsh is not None:
+                self.lsh.add(case_id, features.token_strings())
+            if self.tfidf is not None:
+                self.tfidf.add(case_id, features)
+
+    def bulk_load(self, entries, postings, section_entries, records=None):
+        with self._lock:
+            self._features = {}
+            self._updated_at = {}
+            self._ordinals = {}
+            self._records = records or {}
+            for case_id, features, updated_at, ordinal in entries:
+                self._features[case_id] = features
+                self._updated_at[case_id] = updated_at
+                self._ordinals[case_id] = ordinal
+                self._advance_watermark(updated_at)
+            self._next_ordinal = max(self._ordinals.values(), default=-1) + 1
+            self._postings = postings
+            self._section_entries = section_entries
+            if self.lsh is not None:
+                self.attach_lsh(type(self.lsh)(self.lsh.bands, self.lsh.rows))
+            if self.tfidf is not None:
+                self.attach_tfidf(type(self.tfidf)())
+            self.version += 1
+            self._changes.clear()
+            self._changes_floor = self.version
+
+    def records(self):
+        with self._lock:
+            return dict(self._records)
+
+    def fingerprint(self):
+        return len(self._features), self._watermark
+
+    def entry(self, case_id):
+        with self._lock:
+            features = self._features.get(case_id)
+            if features is None:
+                return None
+            return case_id, features, self._updated_at.get(case_id), self._ordinals[case_id]
+
+    def partition(self, count):
+        with self._lock:
+            shards = [[] for _ in range(count)]
+            ordered = sorted(self._features, key=self._ordinals.__getitem__)
+            for position, case_id in enumerate(ordered):
+                shards[position % count].append(
+                    (case_id, self._features[case_id], self._updated_at.get(case_id), self._ordinals[case_id]))
+            return shards
+
+    def remove(self, case_id):
+        with self._lock:
+            self._updated_at.pop(case_id, None)
+            self._ordinals.pop(case_id, None)
+            removed = self._unindex(case_id)
+            if removed:
+                self._record_change(case_id)
+            return removed
+
+    def _unindex(self, case_id):
+        self._records.pop(case_id, None)
+        features = self._features.pop(case_id, None)
+        if features is None:
+            return False
+        if self.lsh is not None:
+            self.lsh.remove(case_id)
+        if self.tfidf is not None:
+            self.tfidf.remove(case_id, features)
+        for term in features.index_terms():
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.discard(case_id)
+                if not posting:
+                    del self._postings[term]
+        for section, number in features.section_numbers:
+            entry = (number, case_id, section)
+            position = bisect.bisect_left(self._section_entries, entry)
+            if position < len(self._section_entries) and self._section_entries[position] == entry:
+                del self._section_entries[position]
+        return True
+
+    def _full_refresh(self, collection):
+        current = {}
+        for doc in collection.find({"bailStatus": {"$in": DECIDED_STATUSES}}, {"_id": 0, "caseId": 1, "updatedAt": 1}):
+            if doc.get("caseId"):
+                current[doc["caseId"]] = doc.get("updatedAt")
+
+        changed = False
+        for case_id in [cid for cid in self._features if cid not in current]:
+            changed = self.remove(case_id) or changed
+
+        stale = [cid for cid, updated_at in current.items()
+                 if cid not in self._features or updated_at is None or self._updated_at.get(cid) != updated_at]
+        for start in range(0, len(stale), FETCH_BATCH_SIZE):
+            batch = stale[start:start + FETCH_BATCH_SIZE]
+            for case in collection.find({"caseId": {"$in": batch}}, CASE_PROJECTION):
+                changed = self.upsert(case) or changed
+        for updated_at in current.values():
+            self._advance_watermark(updated_at)
+        return changed
+
+    def _incremental_refresh(self, collection):
+        if self._watermark is None:
+            return self._full_refresh(collection)
+
+        changed = False
+        for case in collection.find({"updatedAt": {"$gte": self._watermark}}, CASE_PROJECTION):
+            changed = self.upsert(case) or changed
+        return changed
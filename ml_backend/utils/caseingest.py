@@ -0,0 +1,147 @@
+import datetime
+import logging
+import os
+import threading
+import time
+
+from utils.caseindex import CASE_PROJECTION, FETCH_BATCH_SIZE
+from utils.servicecontext import get_case_collection
+from utils.similarcasefetcher import case_index
+
+logger = logging.getLogger("jurisdict.caseingest")
+
+CHANGE_STREAM_ENABLED = os.getenv("CASE_INDEX_CHANGE_STREAM", "").lower() in ("1", "true", "yes")
+CHANGE_STREAM_RETRY_SECONDS = float(os.getenv("CASE_INDEX_CHANGE_STREAM_RETRY_SECONDS", 5))
+
+# mongod answers watch() on a standalone server with these codes, polling is the only option there
+_CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+
+_tail_lock = threading.Lock()
+_tail_pid = None
+_tail_state = {"running": False, "events": 0, "resumeToken": None}
+
+
+def _parse_timestamp(value):
+    # pushed documents arrive as JSON, the index compares updatedAt the way pymongo returns it: naive UTC
+    if not isinstance(value, str):
+        return value if isinstance(value, datetime.datetime) else None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def ingest_cases(cases):
+    # pushed and streamed cases never move the watermark, polling stays responsible for what it has not seen
+    upserted = []
+    unchanged = []
+    for case in cases:
+        case_id = case.get("caseId")
+        if not case_id:
+            continue
+        case = dict(case, updatedAt=_parse_timestamp(case.get("updatedAt")))
+        (upserted if case_index.upsert(case, advance_watermark=False) else unchanged).append(case_id)
+    return {"upserted": upserted, "unchanged": unchanged}
+
+
+def ingest_case_ids(case_ids, collection=None):
+    # the database copy is authoritative, an id that is missing or no longer decided leaves the index
+    collection = collection or get_case_collection()
+    case_ids = list(dict.fromkeys(case_id for case_id in case_ids if case_id))
+    found = set()
+    result = {"upserted": [], "unchanged": [], "removed": []}
+    for start in range(0, len(case_ids), FETCH_BATCH_SIZE):
+        batch = case_ids[start:start + FETCH_BATCH_SIZE]
+        for case in collection.find({"caseId": {"$in": batch}}, CASE_PROJECTION):
+            found.add(case["caseId"])
+            if case_index.upsert(case, advance_watermark=False):
+                key = "upserted" if case_index.get(case["caseId"]) is not None else "removed"
+                result[key].append(case["caseId"])
+            else:
+                result["unchanged"].append(case["caseId"])
+    for case_id in case_ids:
+        if case_id not in found and case_index.remove(case_id):
+            result["removed"].append(case_id)
+    return result
+
+
+def index_status():
+    count, watermark = case_index.fingerprint()
+    return {
+        "indexedCases": count,
+        "corpusVersion": case_index.version,
+        "watermark": watermark.isoformat() if watermark is not None else None,
+        "changeStream": dict(_tail_state, resumeToken=None, enabled=CHANGE_STREAM_ENABLED),
+    }
+
+
+def _apply_change(change):
+    operation = change.get("operationType")
+    if operation == "delete":
+        # delete events only carry _id, which the index does not keep, so let a full refresh find the gap
+        case_index.request_full_refresh()
+        return
+    case = change.get("fullDocument")
+    if case is not None:
+        case_index.upsert({field: case.get(field) for field in CASE_PROJECTION if field != "_id"}, advance_watermark=False)
+
+
+def _tail_changes():
+    from pymongo.errors import OperationFailure, PyMongoError
+
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+    while True:
+        try:
+            collection = get_case_collection()
+            with collection.watch(pipeline, full_document="updateLookup",
+                                  resume_after=_tail_state["resumeToken"]) as stream:
+                _tail_state["running"] = True
+                for change in stream:
+                    _apply_change(change)
+                    _tail_state["resumeToken"] = stream.resume_token
+                    _tail_state["events"] += 1
+        except OperationFailure as e:
+            _tail_state["running"] = False
+            if e.code in _CHANGE_STREAMS_UNSUPPORTED:
+                logger.warning("Change streams are not available, the case index keeps polling: %s", e)
+                return
+            logger.warning("Case change stream failed, retrying in %ss: %s", CHANGE_STREAM_RETRY_SECONDS, e)
+            if e.code == 286:
+                # ChangeStreamHistoryLost, the resume point fell off the oplog
+                _tail_state["resumeToken"] = None
+                case_index.request_full_refresh()
+        except PyMongoError as e:
+            _tail_state["running"] = False
+            logger.warning("Case change stream failed, retrying in %ss: %s", CHANGE_STREAM_RETRY_SECONDS, e)
+        except Exception:
+            _tail_state["running"] = False
+            logger.exception("Case change stream stopped, the case index keeps polling")
+            return
+        time.sleep(CHANGE_STREAM_RETRY_SECONDS)
+
+
+def ensure_change_stream_tail():
+    # one tail per process, started lazily so gunicorn workers each get their own after the fork
+    global _tail_pid
+    pid = os.getpid()
+    if not CHANGE_STREAM_ENABLED or _tail_pid == pid:
+        return False
+    with _tail_lock:
+        if _tail_pid == pid:
+            return False
+        _tail_pid = pid
+        _tail_state.update(running=False, events=0, resumeToken=None)
+        threading.Thread(target=_tail_changes, name="case-change-stream", daemon=True).start()
+        return True
+
+
+def _reset_after_fork():
+    global _tail_lock
+    _tail_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
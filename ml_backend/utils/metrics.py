@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("jurisdict.metrics")
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+SLOW_REQUEST_LOG_MS = float(os.getenv("SLOW_REQUEST_LOG_MS", 0))
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, "") for name in self.labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _format_labels(self.labels, key), value) for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for position, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[position] += 1
+                    break
+            self._values[key] = (counts, total + seconds)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    labels = _format_labels(self.labels + ("le",), key + (_format_value(bound),))
+                    samples.append((self.name + "_bucket", labels, cumulative))
+                samples.append((self.name + "_sum", _format_labels(self.labels, key), total))
+                samples.append((self.name + "_count", _format_labels(self.labels, key), cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in metric.samples())
+
+        for collector in self._collectors:
+            try:
+                gauges = collector()
+            except Exception:
+                logger.exception("Metrics collector failed")
+                continue
+            for name, documentation, value in gauges:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _reset_after_fork():
+    # a lock held by another thread at fork time would stay held forever in the child
+    for metric in registry._metrics:
+        metric._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+STAGE_SECONDS = registry.register(Histogram(
+    "jurisdict_stage_duration_seconds", "Time spent in each pipeline stage.", labels=("stage",)))
+REQUEST_SECONDS = registry.register(Histogram(
+    "jurisdict_request_duration_seconds", "End to end request latency.", labels=("route",)))
+REQUESTS = registry.register(Counter(
+    "jurisdict_requests_total", "Requests handled, by route and outcome.", labels=("route", "outcome")))
+ERRORS = registry.register(Counter(
+    "jurisdict_errors_total", "Errors raised inside pipeline stages.", labels=("stage",)))
+AI_FALLBACKS = registry.register(Counter(
+    "jurisdict_ai_fallbacks_total", "AI assistance responses replaced by the flag-based fallback."))
+CANDIDATES = registry.register(Counter(
+    "jurisdict_scored_candidates_total", "Decided cases scored against a query."))
+PRUNED_CANDIDATES = registry.register(Counter(
+    "jurisdict_pruned_candidates_total", "Candidates skipped because their score bound could not reach the top k."))
+PRECOMPUTED_LOOKUPS = registry.register(Counter(
+    "jurisdict_precomputed_lookups_total", "Precomputed assessment lookups, by outcome.", labels=("outcome",)))
+
+_trace = threading.local()
+
+
+def record_stage(name, seconds):
+    STAGE_SECONDS.observe(seconds, stage=name)
+    stages = getattr(_trace, "stages", None)
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+@contextmanager
+def request_trace(route):
+    _trace.stages = {}
+    state = {"outcome": "ok"}
+    started = time.perf_counter()
+    try:
+        yield state
+    except BaseException:
+        state["outcome"] = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        stages = _trace.stages
+        _trace.stages = None
+        REQUEST_SECONDS.observe(elapsed, route=route)
+        REQUESTS.inc(route=route, outcome=state["outcome"])
+        if SLOW_REQUEST_LOG_MS and elapsed * 1000 >= SLOW_REQUEST_LOG_MS:
+            logger.warning("Slow request %s", json.dumps({
+                "route": route,
+                "totalMs": round(elapsed * 1000, 2),
+                "stagesMs": {name: round(seconds * 1000, 2) for name, seconds in stages.items()}
+            }))
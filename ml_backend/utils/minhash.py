@@ -0,0 +1,109 @@
+import os
+import threading
+import zlib
+
+import numpy as np
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+DEFAULT_BANDS = int(os.getenv("LSH_BANDS", 32))
+DEFAULT_ROWS = int(os.getenv("LSH_ROWS", 4))
+
+
+def _token_hash(token):
+    return zlib.crc32(token.encode("utf-8"))
+
+
+class MinHasher:
+    def __init__(self, num_perm, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.randint(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)[:, None]
+        self._hashes = {}
+
+    def _hash_tokens(self, tokens, remember):
+        # only indexed tokens are remembered, a query's unseen words would grow the cache without bound
+        hashes = self._hashes
+        values = []
+        for token in tokens:
+            value = hashes.get(token)
+            if value is None:
+                value = _token_hash(token)
+                if remember:
+                    hashes[token] = value
+            values.append(value)
+        return np.array(values, dtype=np.uint64)
+
+    def signature(self, tokens, remember=True):
+        if not tokens:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        hashed = self._hash_tokens(tokens, remember)[None, :]
+        with np.errstate(over="ignore"):
+            permuted = ((self._a * hashed + self._b) % MERSENNE_PRIME) & MAX_HASH
+        return permuted.min(axis=1)
+
+
+def estimate_jaccard(signature1, signature2):
+    return float(np.count_nonzero(signature1 == signature2)) / len(signature1)
+
+
+def lsh_threshold(bands, rows):
+    return (1.0 / bands) ** (1.0 / rows)
+
+
+class MinHashLSH:
+    def __init__(self, bands=None, rows=None, seed=1):
+        self.bands = bands or DEFAULT_BANDS
+        self.rows = rows or DEFAULT_ROWS
+        self.seed = seed
+        self.hasher = MinHasher(self.bands * self.rows, seed)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def threshold(self):
+        return lsh_threshold(self.bands, self.rows)
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def add(self, key, tokens):
+        keys = self._band_keys(self.hasher.signature(tokens))
+        with self._lock:
+            self._discard(key)
+            for band, band_key in enumerate(keys):
+                self._buckets[band].setdefault(band_key, set()).add(key)
+            self._keys[key] = keys
+
+    def remove(self, key):
+        with self._lock:
+            return self._discard(key)
+
+    def _discard(self, key):
+        keys = self._keys.pop(key, None)
+        if keys is None:
+            return False
+        for band, band_key in enumerate(keys):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
+        return True
+
+    def query(self, tokens):
+        keys = self._band_keys(self.hasher.signature(tokens, remember=False))
+        matched = set()
+        with self._lock:
+            for band, band_key in enumerate(keys):
+                bucket = self._buckets[band].get(band_key)
+                if bucket:
+                    matched.update(bucket)
+        return matched
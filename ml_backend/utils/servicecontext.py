@@ -0,0 +1,74 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MONGO_DB = os.getenv("MONGO_DB", "test")
+
+_lock = threading.Lock()
+_mongo_client = None
+_mongo_pid = None
+_genai = None
+
+
+def _int_env(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _mongo_options():
+    return {
+        "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE", 20),
+        "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": _int_env("MONGO_MAX_IDLE_TIME_MS", 60000),
+        "connectTimeoutMS": _int_env("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "serverSelectionTimeoutMS": _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": _int_env("MONGO_SOCKET_TIMEOUT_MS", 30000),
+    }
+
+
+def get_mongo_client():
+    global _mongo_client, _mongo_pid
+    pid = os.getpid()
+    if _mongo_client is not None and _mongo_pid == pid:
+        return _mongo_client
+
+    with _lock:
+        if _mongo_client is None or _mongo_pid != pid:
+            from pymongo import MongoClient
+
+            uri = os.getenv("MONGODB_URI")
+            _mongo_client = MongoClient(uri, **_mongo_options()) if uri else MongoClient(**_mongo_options())
+            _mongo_pid = pid
+        return _mongo_client
+
+
+def get_case_collection():
+    return get_mongo_client().get_database(MONGO_DB).get_collection("cases")
+
+
+def get_assessment_collection():
+    return get_mongo_client().get_database(MONGO_DB).get_collection("case_assessments")
+
+
+def get_genai():
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None:
+                import google.generativeai as genai
+                _genai = genai
+    return _genai
+
+
+def _reset_after_fork():
+    global _lock, _mongo_client, _mongo_pid
+    # a client inherited from the parent shares its sockets and monitor state, never reuse it
+    _lock = threading.Lock()
+    _mongo_client = None
+    _mongo_pid = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,142 @@
+import heapq
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.caseindex import CaseFeatureIndex
+from utils.minhash import MinHashLSH
+
+logger = logging.getLogger("jurisdict.shardedscorer")
+
+SIMILARITY_SHARDS = int(os.getenv("SIMILARITY_SHARDS", 0))
+SIMILARITY_SHARD_MIN_CASES = int(os.getenv("SIMILARITY_SHARD_MIN_CASES", 5000))
+SHARD_DELTA_MAX_CASES = int(os.getenv("SIMILARITY_SHARD_DELTA_MAX_CASES", 1000))
+
+_shard = None
+
+
+def _load_shard(entries, version, lsh_params, tfidf_model):
+    global _shard
+    # the pool is forked from a server worker, whose signal handlers must not run here
+    for name in ("SIGTERM", "SIGINT", "SIGQUIT", "SIGHUP", "SIGUSR1", "SIGUSR2", "SIGWINCH"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), signal.SIG_DFL)
+
+    index = CaseFeatureIndex(None, refresh_interval=math.inf, full_refresh_interval=math.inf)
+    for case_id, features, updated_at, ordinal in entries:
+        index.load(case_id, features, updated_at, ordinal)
+    index.version = version
+    if lsh_params is not None:
+        index.attach_lsh(MinHashLSH(*lsh_params))
+    _shard = (index, tfidf_model.subset([case_id for case_id, _, _, _ in entries]) if tfidf_model is not None else None)
+
+
+def _apply_changes(shard, shard_count, changes, version):
+    index = _shard[0]
+    for case_id, entry in changes:
+        index.remove(case_id)
+        if entry is not None and entry[3] % shard_count == shard:
+            index.load(*entry)
+    index.version = version
+    return len(index)
+
+
+def _shard_size():
+    return len(_shard[0])
+
+
+def _score_shard(queries, top_k, use_tfidf, use_lsh):
+    from utils.similarcasefetcher import _score_top_k
+
+    index, tfidf_model = _shard
+    tfidf_scores = None
+    if use_tfidf:
+        tfidf_scores = tfidf_model.score_many([current.token_count_map() for current, _ in queries])
+
+    results = []
+    for position, (current, current_case_id) in enumerate(queries):
+        scores = tfidf_scores[:, position] if tfidf_scores is not None else None
+        results.append(_score_top_k(current, current_case_id, index, tfidf_model, scores, top_k,
+                                    index.lsh if use_lsh else None))
+    return results
+
+
+class ShardedScorer:
+    def __init__(self, shard_count=None, min_cases=None):
+        self.shard_count = SIMILARITY_SHARDS if shard_count is None else shard_count
+        self.min_cases = SIMILARITY_SHARD_MIN_CASES if min_cases is None else min_cases
+        self._pools = []
+        self._version = None
+        self._has_tfidf = False
+        self._has_lsh = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.shard_count > 1 and "fork" in multiprocessing.get_all_start_methods()
+
+    def should_shard(self, index):
+        return self.enabled and len(index) >= self.min_cases
+
+    def _ensure_pools(self, index, tfidf_model, use_tfidf, use_lsh):
+        with self._lock:
+            covered = (not use_tfidf or self._has_tfidf) and (not use_lsh or self._has_lsh)
+            if self._pools and self._version == index.version and covered:
+                return self._pools
+            if self._pools and covered and not self._has_tfidf and self._forward_changes(index):
+                return self._pools
+
+            stale = self._pools
+            version = index.version
+            lsh = index.lsh
+            lsh_params = (lsh.bands, lsh.rows) if lsh is not None else None
+            context = multiprocessing.get_context("fork")
+            pools = [
+                ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_load_shard,
+                                    initargs=(entries, version, lsh_params, tfidf_model))
+                for entries in index.partition(self.shard_count)
+            ]
+            sizes = [future.result() for future in [pool.submit(_shard_size) for pool in pools]]
+            logger.warning("Started %d scoring shards for index version %s with %s cases", len(pools), version, sizes)
+
+            self._pools = pools
+            self._version = version
+            self._has_tfidf = tfidf_model is not None
+            self._has_lsh = lsh_params is not None
+        for pool in stale:
+            pool.shutdown(wait=False)
+        return pools
+
+    def _forward_changes(self, index):
+        # jaccard shards take ingested changes in place; tf-idf shards are rebuilt since idf moves with every change
+        version = index.version
+        changed = index.changes_since(self._version)
+        if changed is None or len(changed) > SHARD_DELTA_MAX_CASES:
+            return False
+        changes = [(case_id, index.entry(case_id)) for case_id in changed]
+        # each pool has one worker, so these run before any scoring submitted after them
+        for shard, pool in enumerate(self._pools):
+            pool.submit(_apply_changes, shard, len(self._pools), changes, version)
+        self._version = version
+        return True
+
+    def rank(self, index, queries, top_k, use_tfidf=False, use_lsh=False, tfidf_model=None):
+        if use_tfidf and tfidf_model is None:
+            raise ValueError("TF-IDF scoring needs the model the shards are built from")
+        pools = self._ensure_pools(index, tfidf_model, use_tfidf, use_lsh)
+        futures = [pool.submit(_score_shard, queries, top_k, use_tfidf, use_lsh) for pool in pools]
+        shard_results = [future.result() for future in futures]
+        return [heapq.nlargest(top_k, itertools.chain.from_iterable(per_shard)) for per_shard in zip(*shard_results)]
+
+    def reset(self):
+        with self._lock:
+            stale = self._pools
+            self._pools = []
+            self._version = None
+        for pool in stale:
+            pool.shutdown(wait=False)
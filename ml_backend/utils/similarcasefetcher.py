@@ -1,19 +1,25 @@
 import os
 import re
-from dotenv import load_dotenv
-from pymongo import MongoClient
+import sys
+import logging
 import math
 import hashlib
+import heapq
+import threading
 import time
+from array import array
 from collections import Counter
-from bson.objectid import ObjectId
+from functools import lru_cache
+import numpy as np
+from utils.caseindex import CaseFeatureIndex
+from utils.lrucache import LRUCache
+from utils.minhash import MinHashLSH
+from utils.servicecontext import get_case_collection
+from utils.shardedscorer import ShardedScorer
+from utils.vocabulary import vocabulary
+from utils.metrics import CANDIDATES, ERRORS, PRUNED_CANDIDATES, record_stage, stage
 
-load_dotenv()
-MONGO_URI = os.getenv("MONGODB_URI")
-MONGO_DB = os.getenv("MONGO_DB", "test")
-client = MongoClient(MONGO_URI) if MONGO_URI else MongoClient()
-db = client.get_database(MONGO_DB)
-case_collection = db.get_collection("cases")
+logger = logging.getLogger("jurisdict.similarcasefetcher")
 
 LEGAL_KEYWORDS = {
     'violent_crimes': ['murder', 'assault', 'battery', 'violence', 'attack', 'homicide', 'manslaughter', 'grievous hurt', 'attempt to murder'],
@@ -50,145 +56,280 @@ def _clean_and_tokenize(text):
     tokens = [token for token in text.split() if token not in STOPWORDS and len(token) > 2]
     return text, tokens
 
-def _cosine_similarity(vec1, vec2):
-    if not vec1 or not vec2:
-        return 0.0
-    
-    dot_product = sum(a * b for a, b in zip(vec1, vec2))
-    magnitude1 = math.sqrt(sum(a * a for a in vec1))
-    magnitude2 = math.sqrt(sum(b * b for b in vec2))
-    
-    if magnitude1 == 0 or magnitude2 == 0:
-        return 0.0
-    
-    return dot_product / (magnitude1 * magnitude2)
+def _row_magnitudes(matrix):
+    return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+
+def _cosine_similarity(matrix, vector, magnitudes=None):
+    if matrix.shape[0] == 0 or vector.nnz == 0:
+        return np.zeros(matrix.shape[0])
+
+    dot_products = (matrix @ vector.T).toarray().ravel()
+    if magnitudes is None:
+        magnitudes = _row_magnitudes(matrix)
+    query_magnitude = math.sqrt(vector.multiply(vector).sum())
+
+    if query_magnitude == 0:
+        return np.zeros(matrix.shape[0])
+
+    denominators = magnitudes * query_magnitude
+    similarities = np.zeros(matrix.shape[0])
+    np.divide(dot_products, denominators, out=similarities, where=denominators > 0)
+    return similarities
 
 def _create_tfidf_vector(tokens, vocabulary, idf_scores):
-    tf_counter = Counter(tokens)
-    total_tokens = len(tokens)
-    
-    vector = []
-    for word in vocabulary:
-        tf = tf_counter.get(word, 0) / total_tokens if total_tokens > 0 else 0
-        tfidf = tf * idf_scores.get(word, 0)
-        vector.append(tfidf)
-    
-    return vector
+    from scipy.sparse import csr_matrix
 
-def _build_vocabulary_and_idf(all_documents):
-    vocabulary = set()
-    doc_word_counts = []
-    
-    for doc_tokens in all_documents:
-        vocabulary.update(doc_tokens)
-        doc_word_counts.append(set(doc_tokens))
-    
-    vocabulary = sorted(list(vocabulary))
-    total_docs = len(all_documents)
-    
-    idf_scores = {}
-    for word in vocabulary:
-        docs_containing_word = sum(1 for doc_words in doc_word_counts if word in doc_words)
-        idf = math.log(total_docs / (docs_containing_word + 1))
-        idf_scores[word] = idf
-    
-    return vocabulary, idf_scores
+    tf_counter = tokens if isinstance(tokens, Counter) else Counter(tokens)
+    total_tokens = sum(tf_counter.values())
+
+    words = [word for word in tf_counter if word in vocabulary]
+    if not words or total_tokens == 0:
+        return csr_matrix((1, len(idf_scores)))
+
+    columns = [vocabulary[word] for word in words]
+    tf = np.array([tf_counter[word] for word in words], dtype=float) / total_tokens
+    return csr_matrix((tf * idf_scores[columns], ([0] * len(columns), columns)), shape=(1, len(idf_scores)))
+
+class TfidfModel:
+    def __init__(self, rows, vocabulary, idf_scores, matrix, version):
+        self.version = version
+        self.rows = rows
+        self.vocabulary = vocabulary
+        self.idf_scores = idf_scores
+        self.matrix = matrix
+        self.magnitudes = _row_magnitudes(matrix)
+
+    def score(self, token_counts):
+        vector = _create_tfidf_vector(token_counts, self.vocabulary, self.idf_scores)
+        return _cosine_similarity(self.matrix, vector, self.magnitudes)
+
+    def subset(self, case_ids):
+        rows = [self.rows[case_id] for case_id in case_ids if case_id in self.rows]
+        model = TfidfModel.__new__(TfidfModel)
+        model.version = self.version
+        model.rows = {case_id: row for row, case_id in enumerate(case_id for case_id in case_ids if case_id in self.rows)}
+        model.vocabulary = self.vocabulary
+        model.idf_scores = self.idf_scores
+        model.matrix = self.matrix[rows]
+        model.magnitudes = self.magnitudes[rows]
+        return model
+
+    def score_many(self, token_counts_list):
+        from scipy.sparse import vstack
+
+        if not token_counts_list:
+            return np.zeros((self.matrix.shape[0], 0))
+
+        queries = vstack([_create_tfidf_vector(counts, self.vocabulary, self.idf_scores) for counts in token_counts_list]).tocsr()
+        dot_products = (self.matrix @ queries.T).toarray()
+        query_magnitudes = _row_magnitudes(queries)
+
+        denominators = np.outer(self.magnitudes, query_magnitudes)
+        similarities = np.zeros(dot_products.shape)
+        np.divide(dot_products, denominators, out=similarities, where=denominators > 0)
+        return similarities
+
+TFIDF_COMPACT_RATIO = 0.1
+
+class TfidfIndex:
+    # document frequencies and term-frequency rows are maintained per case, so a new ruling adds one row
+    # instead of rebuilding the model; idf weights are re-applied once per index version
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns = {}
+        self._document_frequency = array('q')
+        self._rows = {}
+        self._row_case_ids = []
+        self._tf_matrix = None
+        self._pending = []
+        self._dead_rows = 0
+        self._model = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, case_id, features):
+        with self._lock:
+            total_tokens = sum(features.token_counts)
+            columns = array('i')
+            for token_id in features.token_ids:
+                column = self._columns.get(token_id)
+                if column is None:
+                    column = self._columns[token_id] = len(self._columns)
+                    self._document_frequency.append(0)
+                self._document_frequency[column] += 1
+                columns.append(column)
+            tf = array('d', (count / total_tokens for count in features.token_counts)) if total_tokens else array('d')
+            self._rows[case_id] = len(self._row_case_ids)
+            self._row_case_ids.append(case_id)
+            self._pending.append((columns, tf))
+
+    def remove(self, case_id, features):
+        with self._lock:
+            row = self._rows.pop(case_id, None)
+            if row is None:
+                return
+            for token_id in features.token_ids:
+                self._document_frequency[self._columns[token_id]] -= 1
+            self._row_case_ids[row] = None
+            self._dead_rows += 1
+
+    def cached(self, version):
+        model = self._model
+        return model if model is not None and model.version == version else None
+
+    def model(self, version):
+        with self._lock:
+            if self._model is None or self._model.version != version:
+                self._merge_pending()
+                if self._dead_rows > len(self._row_case_ids) * TFIDF_COMPACT_RATIO:
+                    self._compact()
+                self._model = self._build_model(version)
+            return self._model
+
+    def _merge_pending(self):
+        from scipy.sparse import csr_matrix, vstack
+
+        if not self._pending:
+            return
+        indptr = np.zeros(len(self._pending) + 1, dtype=np.int64)
+        np.cumsum([len(columns) for columns, _ in self._pending], out=indptr[1:])
+        indices = np.frombuffer(b"".join(columns.tobytes() for columns, _ in self._pending), dtype=np.int32)
+        data = np.frombuffer(b"".join(tf.tobytes() for _, tf in self._pending), dtype=float)
+        width = len(self._columns)
+        delta = csr_matrix((data, indices, indptr), shape=(len(self._pending), width))
+        if self._tf_matrix is None:
+            self._tf_matrix = delta
+        else:
+            self._tf_matrix.resize((self._tf_matrix.shape[0], width))
+            self._tf_matrix = vstack([self._tf_matrix, delta], format="csr")
+        self._pending = []
+
+    def _compact(self):
+        live = [row for row, case_id in enumerate(self._row_case_ids) if case_id is not None]
+        self._tf_matrix = self._tf_matrix[live]
+        self._row_case_ids = [self._row_case_ids[row] for row in live]
+        self._rows = {case_id: row for row, case_id in enumerate(self._row_case_ids)}
+        self._dead_rows = 0
+
+    def _build_model(self, version):
+        from scipy.sparse import csr_matrix
+
+        width = len(self._columns)
+        tf_matrix = self._tf_matrix if self._tf_matrix is not None else csr_matrix((0, width))
+        if tf_matrix.shape[1] != width:
+            tf_matrix.resize((tf_matrix.shape[0], width))
+        document_frequency = np.array(self._document_frequency, dtype=np.int64)
+        total_docs = len(self._rows)
+        idf_scores = np.log(total_docs / (document_frequency + 1)) if total_docs else np.zeros(width)
+        # a token whose last case was removed leaves the vocabulary, as it would on a rebuild
+        present = (document_frequency > 0).tolist()
+        vocabulary = {token_id: column for token_id, column in self._columns.items() if present[column]}
+        return TfidfModel(dict(self._rows), vocabulary, idf_scores, tf_matrix.multiply(idf_scores).tocsr(), version)
+
+THEME_CATEGORIES = (
+    [(category, keywords) for category, keywords in LEGAL_KEYWORDS.items()] +
+    [(f"bail_{category}", keywords) for category, keywords in BAIL_FACTORS.items()]
+)
+
+THEME_NAMES = tuple(theme for theme, _ in THEME_CATEGORIES)
+FEATURE_VERSION = 1
+
+_THEME_KEYWORDS = sorted({keyword for _, keywords in THEME_CATEGORIES for keyword in keywords})
+_SINGLE_WORD_KEYWORDS = tuple(keyword for keyword in _THEME_KEYWORDS if ' ' not in keyword)
+_PHRASE_KEYWORDS = tuple((keyword.split(' ', 1)[0], keyword) for keyword in _THEME_KEYWORDS if ' ' in keyword)
+
+@lru_cache(maxsize=65536)
+def _word_keyword_hits(word):
+    hits = tuple((keyword, word.count(keyword)) for keyword in _SINGLE_WORD_KEYWORDS if keyword in word)
+    phrases = tuple(phrase for head, phrase in _PHRASE_KEYWORDS if word.endswith(head))
+    return hits, phrases
+
+def _count_theme_keywords(text_lower):
+    # single-word keywords cannot span whitespace, so per-word counts add up to text_lower.count()
+    counts = {}
+    phrases = set()
+    for word, occurrences in Counter(text_lower.split()).items():
+        hits, word_phrases = _word_keyword_hits(word)
+        for keyword, count in hits:
+            counts[keyword] = counts.get(keyword, 0) + count * occurrences
+        phrases.update(word_phrases)
+
+    for phrase in phrases:
+        count = text_lower.count(phrase)
+        if count:
+            counts[phrase] = count
+    return counts
 
 def _extract_legal_themes(text, tokens):
+    keyword_counts = _count_theme_keywords(text.lower())
     themes = {}
-    text_lower = text.lower()
-    
-    for category, keywords in LEGAL_KEYWORDS.items():
-        score = sum(text_lower.count(keyword) for keyword in keywords if keyword in text_lower)
-        if score > 0:
-            themes[category] = score
-    
-    for category, keywords in BAIL_FACTORS.items():
-        score = sum(text_lower.count(keyword) for keyword in keywords if keyword in text_lower)
+
+    for theme, keywords in THEME_CATEGORIES:
+        score = sum(keyword_counts.get(keyword, 0) for keyword in keywords)
         if score > 0:
-            themes[f"bail_{category}"] = score
-    
+            themes[theme] = score
+
     return themes
 
-def _extract_entities(text):
-    return {
-        'sections': list(set(re.findall(r'section\s+(\d+[a-z]?)', text.lower()))),
-        'amounts': list(set(re.findall(r'rs\.?\s*(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lakh|crore)?', text.lower()))),
-        'years': list(set(re.findall(r'(\d+)\s*years?', text.lower()))),
-        'acts': list(set(re.findall(r'([a-z\s]+(?:act|code))', text.lower())))
-    }
+def _theme_vector(themes):
+    return array('I', [themes.get(theme, 0) for theme in THEME_NAMES])
 
 def _compute_theme_similarity(themes1, themes2):
-    if not themes1 and not themes2:
-        return 0.0
-    
-    all_themes = set(themes1.keys()) | set(themes2.keys())
-    if not all_themes:
-        return 0.0
-    
     similarity_sum = 0
-    for theme in all_themes:
-        val1 = themes1.get(theme, 0)
-        val2 = themes2.get(theme, 0)
-        max_val = max(val1, val2)
-        if max_val > 0:
-            similarity_sum += min(val1, val2) / max_val
+    present = 0
+    for val1, val2 in zip(themes1, themes2):
+        if val1 or val2:
+            present += 1
+            similarity_sum += min(val1, val2) / max(val1, val2)
     
-    return similarity_sum / len(all_themes)
+    return similarity_sum / present if present else 0.0
 
-def _compute_entity_similarity(entities1, entities2):
-    similarities = []
-    
-    for entity_type in entities1:
-        set1 = set(str(e).strip() for e in entities1[entity_type])
-        set2 = set(str(e).strip() for e in entities2[entity_type])
-        
-        if not set1 and not set2:
-            similarities.append(1.0)
-        elif not set1 or not set2:
-            similarities.append(0.0)
-        else:
-            intersection = len(set1 & set2)
-            union = len(set1 | set2)
-            similarities.append(intersection / union if union > 0 else 0.0)
-    
-    return sum(similarities) / len(similarities) if similarities else 0.0
+_SECTION_NUMBER_PATTERN = re.compile(r'\d+')
+SECTION_PARTIAL_RANGE = 3
 
-def _section_similarity_enhanced(sections1, sections2):
-    if not sections1 and not sections2:
-        return 0.0
-    if not sections1 or not sections2:
-        return 0.0
-    
-    set1 = set(str(s).strip().lower() for s in sections1)
-    set2 = set(str(s).strip().lower() for s in sections2)
-    
-    exact_match = len(set1 & set2)
-    total_sections = len(set1 | set2)
-    
+def _section_number(section):
+    match = _SECTION_NUMBER_PATTERN.search(section)
+    return int(match.group()) if match else None
+
+@lru_cache(maxsize=None)
+def _partial_section_credit(pairs):
+    partial = 0
+    for _ in range(pairs):
+        partial += 0.3
+    return partial
+
+def _section_score(exact_match, partial_pairs, size1, size2):
+    total_sections = size1 + size2 - exact_match
     if total_sections == 0:
         return 0.0
-    
+
     base_sim = exact_match / total_sections
-    
-    partial = 0
-    for s1 in set1:
-        for s2 in set2:
-            if s1 == s2:
-                continue
-            nums1 = re.findall(r'\d+', s1)
-            nums2 = re.findall(r'\d+', s2)
-            if nums1 and nums2:
-                try:
-                    if abs(int(nums1[0]) - int(nums2[0])) <= 3:
-                        partial += 0.3
-                except:
-                    pass
-                    
-    partial_sim = partial / max(len(set1), len(set2)) if set1 and set2 else 0
-    
+    partial_sim = _partial_section_credit(partial_pairs) / max(size1, size2)
+
     return min(1.0, base_sim + partial_sim)
 
+def _batch_section_similarity(current, index):
+    if not current.sections:
+        return {}
+
+    exact_matches = Counter()
+    partial_pairs = Counter()
+    for s1, n1 in current.section_numbers:
+        for _, case_id, s2 in index.sections_in_range(n1 - SECTION_PARTIAL_RANGE, n1 + SECTION_PARTIAL_RANGE):
+            if s2 != s1:
+                partial_pairs[case_id] += 1
+    for s1 in current.sections:
+        exact_matches.update(index.posting(("section", s1)))
+
+    size1 = len(current.sections)
+    scores = {}
+    for case_id in exact_matches.keys() | partial_pairs.keys():
+        case = index.get(case_id)
+        if case is not None:
+            scores[case_id] = _section_score(exact_matches[case_id], partial_pairs[case_id], size1, len(case.sections))
+    return scores
+
 def _compose_enhanced_text(case):
     components = []
     
@@ -212,136 +353,426 @@ def _generate_case_signature(case_data):
     grounds = sorted(str(g) for g in case_data.get("groundsOfBail", []))
     
     signature_data = f"{case_id}|{','.join(sections)}|{','.join(grounds)}"
-    return hashlib.md5(signature_data.encode()).hexdigest()
+    return hashlib.md5(signature_data.encode()).digest()
 
-def _lightweight_semantic_similarity(current_tokens, case_tokens):
-    if not current_tokens or not case_tokens:
+def _compact_overlap_similarity(current_counts, case):
+    # jaccard over distinct tokens blended with count-weighted overlap, over the interned id arrays of a stored case
+    if not current_counts or not case.token_ids:
         return 0.0
-    
-    current_set = set(current_tokens)
-    case_set = set(case_tokens)
-    
-    intersection = len(current_set & case_set)
-    union = len(current_set | case_set)
-    
-    jaccard_sim = intersection / union if union > 0 else 0.0
-    
-    current_counter = Counter(current_tokens)
-    case_counter = Counter(case_tokens)
-    
-    common_words = current_set & case_set
-    if not common_words:
+
+    common = current_counts.keys() & case.token_ids
+    intersection = len(common)
+    jaccard_sim = intersection / (len(current_counts) + len(case.token_ids) - intersection)
+    if not common:
         return jaccard_sim
-    
+
     weighted_overlap = 0
     total_weight = 0
-    
-    for word in common_words:
-        weight = min(current_counter[word], case_counter[word])
-        weighted_overlap += weight
-        total_weight += max(current_counter[word], case_counter[word])
-    
+    for token_id, count in zip(case.token_ids, case.token_counts):
+        if token_id in common:
+            other = current_counts[token_id]
+            weighted_overlap += min(count, other)
+            total_weight += max(count, other)
+
     weighted_sim = weighted_overlap / total_weight if total_weight > 0 else 0.0
-    
+
     return (jaccard_sim * 0.4 + weighted_sim * 0.6)
 
-def find_similar_cases(current_case_data):
-    try:
-        start_time = time.time()
-        current_case_id = current_case_data.get("caseId")
-        current_signature = _generate_case_signature(current_case_data)
-        current_text = _compose_enhanced_text(current_case_data)
-        
-        filter_condition = {"bailStatus": {"$in": ["Accepted", "Declined"]}}
-        if current_case_id:
-            filter_condition["caseId"] = {"$ne": current_case_id}
-            
-        cursor = case_collection.find(
-            filter_condition,
-            {"_id": 0, "caseId": 1, "caseTitle": 1, "caseSummary": 1, 
-             "bnsSections": 1, "groundsOfBail": 1, "bailStatus": 1}
-        ).limit(300)
-        
-        similar_candidates = list(cursor)
-        
-        current_clean_text, current_tokens = _clean_and_tokenize(current_text)
-        current_themes = _extract_legal_themes(current_clean_text, current_tokens)
-        current_entities = _extract_entities(current_clean_text)
-        current_sections = current_case_data.get("bnsSections", []) or []
-        current_grounds = set(str(g).lower().strip() for g in current_case_data.get("groundsOfBail", []))
-        
-        similarities = []
-        
-        for case in similar_candidates:
-            case_id = case.get("caseId")
-            if case_id == current_case_id:
-                continue
-                
-            case_signature = _generate_case_signature(case)
-            if case_signature == current_signature:
+def _unique_strings(values, normalize):
+    return tuple(dict.fromkeys(sys.intern(normalize(value)) for value in values or []))
+
+def _restore_case_features(state, tokens, counts, cls=None):
+    cls = cls or CaseFeatures
+    features = cls.__new__(cls)
+    for name, value in zip(CaseFeatures.__slots__, state):
+        setattr(features, name, value)
+    features._assign_token_ids(tokens)
+    features.token_counts = counts
+    return features
+
+class CaseFeatures:
+    __slots__ = ("case_id", "bail_status", "signature", "token_ids", "token_counts", "themes",
+                 "sections", "section_numbers", "grounds")
+
+    def __init__(self, case):
+        clean_text, tokens = _clean_and_tokenize(_compose_enhanced_text(case))
+        self.case_id = case.get("caseId")
+        self.bail_status = case.get("bailStatus")
+        self.signature = _generate_case_signature(case)
+        self._assign_token_ids(tokens)
+        self.themes = _theme_vector(_extract_legal_themes(clean_text, tokens))
+        self.sections = _unique_strings(case.get("bnsSections"), lambda s: str(s).strip().lower())
+        self.section_numbers = tuple((s, n) for s in self.sections if (n := _section_number(s)) is not None)
+        self.grounds = _unique_strings(case.get("groundsOfBail"), lambda g: str(g).lower().strip())
+
+    def _assign_token_ids(self, tokens):
+        self.token_ids, self.token_counts = vocabulary.intern(tokens)
+
+    def __reduce__(self):
+        # token ids are only meaningful to this process's vocabulary, so pickle the tokens themselves
+        state = tuple(array('I', value) if isinstance(value, memoryview) else value
+                      for value in (getattr(self, name) for name in CaseFeatures.__slots__))
+        return _restore_case_features, (state, self.token_strings(), array('I', self.token_counts), type(self))
+
+    def token_strings(self):
+        return vocabulary.tokens(self.token_ids)
+
+    def token_count_map(self):
+        return dict(zip(self.token_ids, self.token_counts))
+
+    def index_terms(self):
+        terms = [("token", token_id) for token_id in self.token_ids]
+        terms.extend(("section", section) for section in self.sections)
+        terms.extend(("ground", ground) for ground in self.grounds)
+        return terms
+
+class QueryFeatures(CaseFeatures):
+    # a case being matched rather than indexed: its unseen words get transient ids instead of joining the vocabulary
+    __slots__ = ("transient_tokens",)
+
+    def _assign_token_ids(self, tokens):
+        self.token_ids, self.token_counts, self.transient_tokens = vocabulary.lookup(tokens)
+
+    def token_strings(self):
+        return vocabulary.tokens(self.token_ids, self.transient_tokens)
+
+case_index = CaseFeatureIndex(CaseFeatures)
+sharded_scorer = ShardedScorer()
+
+SEMANTIC_SCORERS = ("jaccard", "tfidf")
+
+def _cached_tfidf_model():
+    tfidf = case_index.tfidf
+    return tfidf.cached(case_index.version) if tfidf is not None else None
+
+def _get_tfidf_model():
+    tfidf = case_index.tfidf
+    if tfidf is None:
+        tfidf = case_index.attach_tfidf(TfidfIndex())
+    return tfidf.model(case_index.version)
+
+CANDIDATE_MODES = ("exact", "lsh")
+
+_result_cache = LRUCache(
+    maxsize=int(os.getenv("SIMILAR_CASE_CACHE_MAXSIZE", 1024)),
+    ttl=float(os.getenv("SIMILAR_CASE_CACHE_TTL_SECONDS", 0)) or None
+)
+_result_cache_version = None
+
+def _get_lsh_index():
+    lsh = case_index.lsh
+    if lsh is None:
+        lsh = case_index.attach_lsh(MinHashLSH())
+    return lsh
+
+_snapshot_lock = threading.Lock()
+_snapshot_checked = False
+
+def _load_case_index_snapshot():
+    global _snapshot_checked
+    path = os.getenv("CASE_INDEX_SNAPSHOT")
+    with _snapshot_lock:
+        if _snapshot_checked or not path:
+            return False
+        _snapshot_checked = True
+        if not os.path.exists(path):
+            logger.warning("Case index snapshot %s does not exist, featurizing the corpus live", path)
+            return False
+
+        from utils.snapshot import SnapshotError, load_snapshot
+
+        try:
+            metadata = load_snapshot(path, case_index)
+        except (OSError, ValueError, KeyError, SnapshotError) as e:
+            logger.warning("Ignoring case index snapshot %s, featurizing the corpus live: %s", path, e)
+            return False
+        logger.warning("Loaded %d cases from case index snapshot %s", metadata["caseCount"], path)
+        return True
+
+def _refresh_case_index(force=False):
+    # a snapshot only seeds the index, the refresh below re-featurizes whatever changed since it was written
+    if not case_index.is_warm:
+        _load_case_index_snapshot()
+    case_index.refresh(get_case_collection(), force=force)
+
+def warm_case_index():
+    _refresh_case_index(force=True)
+    if _resolve_semantic_scorer(None) == "tfidf":
+        _get_tfidf_model()
+    if _resolve_candidate_mode(None) == "lsh":
+        _get_lsh_index()
+    return len(case_index)
+
+def _resolve_semantic_scorer(semantic_scorer):
+    semantic_scorer = semantic_scorer or os.getenv("SEMANTIC_SCORER", "jaccard")
+    return semantic_scorer if semantic_scorer in SEMANTIC_SCORERS else "jaccard"
+
+def _resolve_candidate_mode(candidate_mode):
+    candidate_mode = candidate_mode or os.getenv("SIMILARITY_CANDIDATE_MODE", "exact")
+    return candidate_mode if candidate_mode in CANDIDATE_MODES else "exact"
+
+SIMILARITY_WEIGHTS = {
+    'semantic': 0.40,
+    'section': 0.35,
+    'theme': 0.15,
+    'grounds': 0.10
+}
+SCORE_THRESHOLD = 0.1
+_BOUND_SLACK = 1e-9
+
+def _semantic_upper_bound(current_tokens, case_tokens):
+    if not current_tokens or not case_tokens:
+        return 0.0
+    smaller, larger = sorted((len(current_tokens), len(case_tokens)))
+    return (smaller / larger) * 0.4 + 0.6
+
+def _combine_scores(semantic_sim, section_sim, theme_sim, grounds_sim):
+    final_score = (
+        semantic_sim * SIMILARITY_WEIGHTS['semantic'] +
+        section_sim * SIMILARITY_WEIGHTS['section'] +
+        theme_sim * SIMILARITY_WEIGHTS['theme'] +
+        grounds_sim * SIMILARITY_WEIGHTS['grounds']
+    )
+    return max(0, min(final_score, 1.0))
+
+def _cannot_enter(bound, heap, top_k):
+    bound += _BOUND_SLACK
+    if bound <= SCORE_THRESHOLD:
+        return True
+    return len(heap) >= top_k and round(min(bound, 1.0) * 100, 2) < heap[0][0]
+
+def _score_top_k(current, current_case_id, index, tfidf_model=None, tfidf_scores=None, top_k=5, lsh=None):
+    with stage("section_similarity"):
+        section_scores = _batch_section_similarity(current, index)
+
+    with stage("candidate_fetch"):
+        if lsh is not None:
+            candidates = index.candidates((), lsh.query(current.token_strings()).union(section_scores))
+        else:
+            candidates = index.candidates(current.index_terms(), section_scores)
+    CANDIDATES.inc(len(candidates))
+
+    # min-heap of the best top_k so far; candidates arrive in ordinal order, so -ordinal breaks ties like a stable sort
+    heap = []
+    pruned = 0
+    current_counts = current.token_count_map()
+    current_grounds = set(current.grounds)
+    clock = time.perf_counter
+    semantic_seconds = theme_seconds = grounds_seconds = 0.0
+
+    for ordinal, case in candidates:
+        case_id = case.case_id
+        if case_id == current_case_id:
+            continue
+
+        if case.signature == current.signature:
+            continue
+
+        started = clock()
+        grounds_intersection = len(current_grounds.intersection(case.grounds))
+        grounds_union = len(current_grounds) + len(case.grounds) - grounds_intersection
+        grounds_sim = grounds_intersection / grounds_union if grounds_union > 0 else 0.0
+        section_sim = section_scores.get(case_id, 0.0)
+
+        if tfidf_scores is not None:
+            row = tfidf_model.rows.get(case_id)
+            semantic_sim = float(tfidf_scores[row]) if row is not None else 0.0
+            semantic_bound = semantic_sim
+        else:
+            semantic_sim = None
+            semantic_bound = _semantic_upper_bound(current.token_ids, case.token_ids)
+        grounds_done = clock()
+        grounds_seconds += grounds_done - started
+
+        if _cannot_enter(_combine_scores(semantic_bound, section_sim, 1.0, grounds_sim), heap, top_k):
+            pruned += 1
+            continue
+
+        theme_sim = _compute_theme_similarity(current.themes, case.themes)
+        theme_done = clock()
+        theme_seconds += theme_done - grounds_done
+
+        if semantic_sim is None:
+            if _cannot_enter(_combine_scores(semantic_bound, section_sim, theme_sim, grounds_sim), heap, top_k):
+                pruned += 1
                 continue
-                
-            case_text = _compose_enhanced_text(case)
-            case_clean_text, case_tokens = _clean_and_tokenize(case_text)
-            
-            semantic_sim = _lightweight_semantic_similarity(current_tokens, case_tokens)
-            
-            theme_sim = _compute_theme_similarity(current_themes, 
-                _extract_legal_themes(case_clean_text, case_tokens))
-            
-            entity_sim = _compute_entity_similarity(current_entities,
-                _extract_entities(case_clean_text))
-            
-            section_sim = _section_similarity_enhanced(current_sections,
-                case.get("bnsSections", []))
-            
-            case_grounds = set(str(g).lower().strip() for g in case.get("groundsOfBail", []))
-            grounds_intersection = len(current_grounds & case_grounds)
-            grounds_union = len(current_grounds | case_grounds)
-            grounds_sim = grounds_intersection / grounds_union if grounds_union > 0 else 0.0
-            
-            weights = {
-                'semantic': 0.40,
-                'section': 0.35,
-                'theme': 0.15,
-                'grounds': 0.10
-            }
-            
-            final_score = (
-                semantic_sim * weights['semantic'] +
-                section_sim * weights['section'] +
-                theme_sim * weights['theme'] +
-                grounds_sim * weights['grounds']
-            )
-            
-            final_score = max(0, min(final_score, 1.0))
-            
-            if final_score > 0.1:
-                similarities.append({
-                    "caseId": case_id,
-                    "similarityPercentage": round(final_score * 100, 2),
-                    "bailStatus": case.get("bailStatus"),
-                    "semantic_score": semantic_sim,
-                    "section_score": section_sim,
-                    "theme_score": theme_sim,
-                    "grounds_score": grounds_sim
-                })
-        
-        similarities.sort(key=lambda x: (x["similarityPercentage"], x["semantic_score"], x["section_score"]), reverse=True)
-        
-        unique_cases = []
-        seen_ids = set()
-        
-        for case in similarities:
-            if case["caseId"] not in seen_ids:
-                seen_ids.add(case["caseId"])
-                unique_cases.append({
-                    "caseId": case["caseId"],
-                    "similarityPercentage": case["similarityPercentage"]
-                })
-                if len(unique_cases) >= 5:
-                    break
-        
-        return unique_cases
-    except Exception as e:
-        return []
\ No newline at end of file
+            semantic_sim = _compact_overlap_similarity(current_counts, case)
+            semantic_seconds += clock() - theme_done
+
+        final_score = _combine_scores(semantic_sim, section_sim, theme_sim, grounds_sim)
+        if final_score <= SCORE_THRESHOLD:
+            continue
+
+        entry = (round(final_score * 100, 2), semantic_sim, section_sim, -ordinal, case_id)
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    PRUNED_CANDIDATES.inc(pruned)
+    record_stage("semantic_similarity", semantic_seconds)
+    record_stage("theme_similarity", theme_seconds)
+    record_stage("grounds_similarity", grounds_seconds)
+
+    with stage("sort_dedup"):
+        heap.sort(reverse=True)
+    return heap
+
+def _format_ranked(entries):
+    return [{"caseId": case_id, "similarityPercentage": percentage} for percentage, _, _, _, case_id in entries]
+
+def _rank_similar_cases(current, current_case_id, tfidf_model=None, tfidf_scores=None, top_k=5, lsh=None):
+    return _format_ranked(_score_top_k(current, current_case_id, case_index, tfidf_model, tfidf_scores, top_k, lsh))
+
+def _rank_sharded(queries, tfidf_model, top_k, use_lsh):
+    try:
+        with stage("sharded_scoring"):
+            return [_format_ranked(entries) for entries in
+                    sharded_scorer.rank(case_index, queries, top_k, tfidf_model is not None, use_lsh,
+                                        tfidf_model or _cached_tfidf_model())]
+    except Exception:
+        ERRORS.inc(stage="sharded_scoring")
+        logger.exception("Sharded scoring failed, scoring in process")
+        sharded_scorer.reset()
+        return None
+
+def get_similar_case_cache_stats():
+    return dict(_result_cache.stats(), corpusVersion=_result_cache_version)
+
+PROJECTABLE_FIELDS = ("caseTitle", "bnsSections", "bailStatus", "courtName", "summaryExcerpt")
+
+def _resolve_projection(projection):
+    if projection is True:
+        return PROJECTABLE_FIELDS
+    if isinstance(projection, str):
+        projection = projection.split(",")
+    if isinstance(projection, (list, tuple)):
+        return tuple(field.strip() for field in projection if isinstance(field, str) and field.strip() in PROJECTABLE_FIELDS)
+    return ()
+
+def _project(results, fields):
+    # a case that left the index since it was ranked keeps only its id, callers look those up themselves
+    if fields:
+        for result in results:
+            record = case_index.record(result["caseId"])
+            if record is not None:
+                result.update((field, record[field]) for field in fields)
+    return results
+
+def _result_cache_key(case_data, semantic_scorer, top_k, candidate_mode):
+    global _result_cache_version
+    version = case_index.version
+    if version != _result_cache_version:
+        # every cached ranking was computed against an older corpus
+        _result_cache.clear()
+        _result_cache_version = version
+    text_digest = hashlib.md5(f"{case_data.get('caseTitle', '')}\0{case_data.get('caseSummary', '')}".encode()).digest()
+    # swapping the LSH index changes candidates without touching the corpus version
+    lsh = _get_lsh_index() if candidate_mode == "lsh" else None
+    lsh_params = (lsh.bands, lsh.rows, lsh.seed) if lsh is not None else None
+    return _generate_case_signature(case_data), text_digest, version, semantic_scorer, top_k, candidate_mode, lsh_params
+
+def _cached_result(cache_key):
+    cached = _result_cache.get(cache_key)
+    return [dict(entry) for entry in cached] if cached is not None else None
+
+def _store_result(cache_key, ranked):
+    _result_cache.set(cache_key, [dict(entry) for entry in ranked])
+    return ranked
+
+def _find_similar_cases(current_case_data, semantic_scorer, top_k, candidate_mode):
+    try:
+        with stage("candidate_fetch"):
+            _refresh_case_index()
+
+        semantic_scorer = _resolve_semantic_scorer(semantic_scorer)
+        candidate_mode = _resolve_candidate_mode(candidate_mode)
+        cache_key = _result_cache_key(current_case_data, semantic_scorer, top_k, candidate_mode)
+        cached = _cached_result(cache_key)
+        if cached is not None:
+            return cached
+
+        with stage("featurize"):
+            current = QueryFeatures(current_case_data)
+
+        use_tfidf = semantic_scorer == "tfidf"
+        lsh = _get_lsh_index() if candidate_mode == "lsh" else None
+
+        if sharded_scorer.should_shard(case_index):
+            tfidf_model = _get_tfidf_model() if use_tfidf else None
+            ranked = _rank_sharded([(current, current_case_data.get("caseId"))], tfidf_model, top_k, lsh is not None)
+            if ranked is not None:
+                return _store_result(cache_key, ranked[0])
+
+        tfidf_model = tfidf_scores = None
+        if use_tfidf:
+            with stage("semantic_similarity"):
+                tfidf_model = _get_tfidf_model()
+                tfidf_scores = tfidf_model.score(current.token_count_map())
+
+        return _store_result(cache_key, _rank_similar_cases(current, current_case_data.get("caseId"), tfidf_model,
+                                                            tfidf_scores, top_k, lsh))
+    except Exception:
+        ERRORS.inc(stage="find_similar_cases")
+        logger.exception("find_similar_cases failed for case %s", current_case_data.get("caseId"))
+        return []
+
+def _find_similar_cases_batch(cases_data, semantic_scorer, top_k, candidate_mode):
+    results = [None] * len(cases_data)
+    try:
+        with stage("candidate_fetch"):
+            _refresh_case_index()
+
+        semantic_scorer = _resolve_semantic_scorer(semantic_scorer)
+        candidate_mode = _resolve_candidate_mode(candidate_mode)
+        cache_keys = [_result_cache_key(case_data, semantic_scorer, top_k, candidate_mode) for case_data in cases_data]
+        results = [_cached_result(cache_key) for cache_key in cache_keys]
+        pending = [position for position, result in enumerate(results) if result is None]
+
+        with stage("featurize"):
+            queries = [QueryFeatures(cases_data[position]) for position in pending]
+
+        use_tfidf = bool(queries) and semantic_scorer == "tfidf"
+        lsh = _get_lsh_index() if candidate_mode == "lsh" else None
+
+        if queries and sharded_scorer.should_shard(case_index):
+            tfidf_model = _get_tfidf_model() if use_tfidf else None
+            ranked = _rank_sharded([(query, cases_data[position].get("caseId")) for query, position in zip(queries, pending)],
+                                   tfidf_model, top_k, lsh is not None)
+            if ranked is not None:
+                for position, entries in zip(pending, ranked):
+                    results[position] = _store_result(cache_keys[position], entries)
+                return results
+
+        tfidf_model = tfidf_scores = None
+        if use_tfidf:
+            with stage("semantic_similarity"):
+                tfidf_model = _get_tfidf_model()
+                tfidf_scores = tfidf_model.score_many([query.token_count_map() for query in queries])
+    except Exception:
+        ERRORS.inc(stage="find_similar_cases_batch")
+        logger.exception("find_similar_cases_batch failed to prepare %d cases", len(cases_data))
+        return [result if result is not None else [] for result in results]
+
+    for column, (position, current) in enumerate(zip(pending, queries)):
+        case_data = cases_data[position]
+        try:
+            scores = tfidf_scores[:, column] if tfidf_scores is not None else None
+            results[position] = _store_result(cache_keys[position], _rank_similar_cases(
+                current, case_data.get("caseId"), tfidf_model, scores, top_k, lsh))
+        except Exception:
+            ERRORS.inc(stage="find_similar_cases_batch")
+            logger.exception("find_similar_cases_batch failed for case %s", case_data.get("caseId"))
+            results[position] = []
+    return results
+
+def project_similar_cases(results, projection):
+    return _project([dict(result) for result in results], _resolve_projection(projection))
+
+def find_similar_cases(current_case_data, semantic_scorer=None, top_k=5, candidate_mode=None, projection=None):
+    return _project(_find_similar_cases(current_case_data, semantic_scorer, top_k, candidate_mode),
+                    _resolve_projection(projection))
+
+def find_similar_cases_batch(cases_data, semantic_scorer=None, top_k=5, candidate_mode=None, projection=None):
+    fields = _resolve_projection(projection)
+    return [_project(results, fields) for results in _find_similar_cases_batch(cases_data, semantic_scorer, top_k, candidate_mode)]
@@ -0,0 +1,242 @@
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+import numpy as np
+
+from utils.caseindex import DECIDED_STATUSES, SUMMARY_EXCERPT_CHARS
+from utils.similarcasefetcher import (
+    BAIL_FACTORS, FEATURE_VERSION, LEGAL_KEYWORDS, STOPWORDS, THEME_NAMES, CaseFeatures, _section_number
+)
+from utils.vocabulary import vocabulary
+
+SNAPSHOT_MAGIC = b"JDCASEIX"
+SNAPSHOT_FORMAT_VERSION = 2
+
+# magic, format version, metadata length, payload length, crc32 of metadata + payload
+_HEADER = struct.Struct("<8sIIQI")
+_ALIGNMENT = 8
+_EPOCH = datetime.datetime(1970, 1, 1)
+_NO_TIMESTAMP = -(1 << 63)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def featurizer_fingerprint():
+    # any change to what CaseFeatures extracts must invalidate existing snapshots
+    material = json.dumps([FEATURE_VERSION, THEME_NAMES, sorted(STOPWORDS), LEGAL_KEYWORDS, BAIL_FACTORS, SUMMARY_EXCERPT_CHARS],
+                          sort_keys=True)
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def corpus_fingerprint(collection):
+    query = {"bailStatus": {"$in": DECIDED_STATUSES}}
+    latest = next(iter(collection.find(query, {"_id": 0, "updatedAt": 1}).sort("updatedAt", -1).limit(1)), None)
+    return collection.count_documents(query), latest.get("updatedAt") if latest else None
+
+
+def snapshot_is_current(metadata, collection):
+    count, latest = corpus_fingerprint(collection)
+    return count == metadata["caseCount"] and _to_micros(latest) == metadata["watermark"]
+
+
+def _to_micros(value):
+    if not isinstance(value, datetime.datetime):
+        return _NO_TIMESTAMP
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _from_micros(value):
+    return None if value == _NO_TIMESTAMP else _EPOCH + datetime.timedelta(microseconds=value)
+
+
+def _little_endian(values, dtype):
+    return np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+
+
+def write_snapshot(path, index):
+    entries = index.partition(1)[0]
+
+    lengths = np.array([len(features.token_ids) for _, features, _, _ in entries], dtype=np.uint64)
+    token_offsets = np.zeros(len(entries) + 1, dtype=np.uint64)
+    np.cumsum(lengths, out=token_offsets[1:])
+    token_ids = np.array([token_id for _, features, _, _ in entries for token_id in features.token_ids], dtype=np.uint32)
+    # only tokens a stored case still uses are written, renumbered densely so a fresh load keeps them as is
+    live_ids, token_ids = np.unique(token_ids, return_inverse=True)
+    token_ids = token_ids.astype(np.uint32)
+    tokens = vocabulary.tokens(live_ids.tolist())
+    token_counts = np.array([count for _, features, _, _ in entries for count in features.token_counts], dtype=np.uint32)
+
+    # token postings as CSR over token ids, rows ascending within each posting
+    rows = np.repeat(np.arange(len(entries), dtype=np.uint32), lengths.astype(np.int64))
+    order = np.argsort(token_ids, kind="stable")
+    posting_offsets = np.zeros(len(tokens) + 1, dtype=np.uint64)
+    np.cumsum(np.bincount(token_ids, minlength=len(tokens)), out=posting_offsets[1:])
+
+    rows_by_case = {case_id: row for row, (case_id, _, _, _) in enumerate(entries)}
+    arrays = {
+        "tokenOffsets": _little_endian(token_offsets, np.uint64),
+        "tokenIds": _little_endian(token_ids, np.uint32),
+        "tokenCounts": _little_endian(token_counts, np.uint32),
+        "themes": _little_endian([list(features.themes) for _, features, _, _ in entries] or np.zeros((0, len(THEME_NAMES))), np.uint32),
+        "signatures": np.frombuffer(b"".join(features.signature for _, features, _, _ in entries), dtype=np.uint8),
+        "ordinals": _little_endian([ordinal for _, _, _, ordinal in entries], np.uint64),
+        "updatedAt": _little_endian([_to_micros(updated_at) for _, _, updated_at, _ in entries], np.int64),
+        "postingOffsets": _little_endian(posting_offsets, np.uint64),
+        "postingRows": _little_endian(rows[order], np.uint32),
+    }
+
+    watermark = index.fingerprint()[1]
+    records = index.records()
+    metadata = {
+        "featurizer": featurizer_fingerprint(),
+        "createdAt": time.time(),
+        "caseCount": len(entries),
+        "watermark": _to_micros(watermark),
+        "themeNames": THEME_NAMES,
+        "vocabulary": tokens,
+        "cases": [[case_id, features.bail_status, features.sections, features.grounds]
+                  for case_id, features, _, _ in entries],
+        "records": [records.get(case_id) for case_id, _, _, _ in entries],
+        "sectionEntries": [[number, rows_by_case[case_id], section] for number, case_id, section in index.section_entries()],
+        "arrays": {},
+    }
+
+    offset = 0
+    for name, values in arrays.items():
+        offset += -offset % _ALIGNMENT
+        metadata["arrays"][name] = [offset, values.dtype.str, values.size]
+        offset += values.nbytes
+    encoded = json.dumps(metadata, separators=(",", ":")).encode()
+    encoded += b" " * (-(_HEADER.size + len(encoded)) % _ALIGNMENT)
+
+    payload = bytearray(offset)
+    for name, values in arrays.items():
+        start = metadata["arrays"][name][0]
+        payload[start:start + values.nbytes] = values.tobytes()
+
+    checksum = zlib.crc32(payload, zlib.crc32(encoded))
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as snapshot_file:
+        snapshot_file.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(encoded), len(payload), checksum))
+        snapshot_file.write(encoded)
+        snapshot_file.write(payload)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary, path)
+    return len(entries)
+
+
+def _open(path, verify):
+    with open(path, "rb") as snapshot_file:
+        mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapped) < _HEADER.size:
+        raise SnapshotError(f"{path} is truncated")
+
+    magic, format_version, metadata_length, payload_length, checksum = _HEADER.unpack_from(mapped)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{path} is not a case index snapshot")
+    if format_version != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"snapshot format {format_version} is not supported, expected {SNAPSHOT_FORMAT_VERSION}")
+    payload_start = _HEADER.size + metadata_length
+    if len(mapped) != payload_start + payload_length:
+        raise SnapshotError(f"{path} is truncated")
+
+    view = memoryview(mapped)
+    if verify:
+        computed = zlib.crc32(view[payload_start:], zlib.crc32(view[_HEADER.size:payload_start]))
+        if computed != checksum:
+            raise SnapshotError(f"{path} failed its checksum")
+
+    metadata = json.loads(bytes(view[_HEADER.size:payload_start]))
+    if metadata["featurizer"] != featurizer_fingerprint():
+        raise SnapshotError("snapshot was built by a different featurizer")
+    return mapped, view[payload_start:], metadata
+
+
+def read_snapshot_metadata(path, verify=False):
+    mapped, payload, metadata = _open(path, verify)
+    payload.release()
+    mapped.close()
+    return metadata
+
+
+def load_snapshot(path, index, verify=True):
+    mapped, payload, metadata = _open(path, verify)
+
+    def numeric(name):
+        offset, dtype, size = metadata["arrays"][name]
+        return np.frombuffer(payload, dtype=np.dtype(dtype), count=size, offset=offset)
+
+    def ints(name, typecode):
+        # zero-copy when the file and process share byte order, otherwise one converted copy
+        offset, dtype, size = metadata["arrays"][name]
+        if sys.byteorder == "little":
+            return payload[offset:offset + size * np.dtype(dtype).itemsize].cast(typecode)
+        return memoryview(array(typecode, numeric(name).astype(np.dtype(dtype).newbyteorder("=")).tobytes()))
+
+    mapping = vocabulary.extend(metadata["vocabulary"])
+    identity = all(token_id == position for position, token_id in enumerate(mapping))
+    token_ids = ints("tokenIds", "I")
+    if not identity:
+        remap = np.array(mapping, dtype=np.uint32)
+        token_ids = memoryview(array("I", remap[numeric("tokenIds")].tobytes()))
+    token_counts = ints("tokenCounts", "I")
+    themes = ints("themes", "I")
+    token_offsets = numeric("tokenOffsets").tolist()
+    ordinals = numeric("ordinals").tolist()
+    updated_at = numeric("updatedAt").tolist()
+    signatures = numeric("signatures").tobytes()
+    theme_width = len(metadata["themeNames"])
+
+    entries = []
+    case_ids = []
+    for row, (case_id, bail_status, sections, grounds) in enumerate(metadata["cases"]):
+        features = CaseFeatures.__new__(CaseFeatures)
+        features.case_id = case_id
+        features.bail_status = bail_status
+        features.signature = signatures[row * 16:(row + 1) * 16]
+        start, end = token_offsets[row], token_offsets[row + 1]
+        features.token_ids = token_ids[start:end]
+        features.token_counts = token_counts[start:end]
+        features.themes = themes[row * theme_width:(row + 1) * theme_width]
+        features.sections = tuple(sys.intern(section) for section in sections)
+        features.section_numbers = tuple((s, n) for s in features.sections if (n := _section_number(s)) is not None)
+        features.grounds = tuple(sys.intern(ground) for ground in grounds)
+        entries.append((case_id, features, _from_micros(updated_at[row]), ordinals[row]))
+        case_ids.append(case_id)
+
+    postings = {}
+    posting_offsets = numeric("postingOffsets").tolist()
+    posting_rows = numeric("postingRows")
+    for token_id in range(len(mapping)):
+        start, end = posting_offsets[token_id], posting_offsets[token_id + 1]
+        if start != end:
+            postings[("token", mapping[token_id])] = set(map(case_ids.__getitem__, posting_rows[start:end].tolist()))
+    for case_id, features, _, _ in entries:
+        for section in features.sections:
+            postings.setdefault(("section", section), set()).add(case_id)
+        for ground in features.grounds:
+            postings.setdefault(("ground", ground), set()).add(case_id)
+
+    section_entries = [(number, case_ids[row], sys.intern(section)) for number, row, section in metadata["sectionEntries"]]
+    records = {}
+    for case_id, record in zip(case_ids, metadata["records"]):
+        if record is not None:
+            title, court, sections, excerpt = record
+            records[case_id] = (title, sys.intern(court), tuple(sections), excerpt)
+
+    index.bulk_load(entries, postings, section_entries, records)
+    return metadata
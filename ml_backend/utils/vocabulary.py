@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+from array import array
+from collections import Counter
+
+# ids handed to tokens a query brings but no case has, counted down so they never reach an interned id
+TRANSIENT_ID_CEILING = (1 << 32) - 1
+
+
+class TokenVocabulary:
+    def __init__(self):
+        self._ids = {}
+        self._tokens = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def _add(self, token):
+        with self._lock:
+            token_id = self._ids.get(token)
+            if token_id is None:
+                token_id = len(self._tokens)
+                self._tokens.append(sys.intern(token))
+                self._ids[token] = token_id
+            return token_id
+
+    def intern(self, tokens):
+        # ids keep first-occurrence order, the same order Counter(tokens) iterates in
+        ids = self._ids
+        token_counts = Counter(tokens)
+        token_ids = array("I")
+        counts = array("I")
+        for token, count in token_counts.items():
+            token_id = ids.get(token)
+            token_ids.append(token_id if token_id is not None else self._add(token))
+            counts.append(count)
+        return token_ids, counts
+
+    def lookup(self, tokens):
+        # like intern, but read-only: queries must not grow the vocabulary shared by every case and snapshot
+        ids = self._ids
+        token_counts = Counter(tokens)
+        token_ids = array("I")
+        counts = array("I")
+        transient = {}
+        for token, count in token_counts.items():
+            token_id = ids.get(token)
+            if token_id is None:
+                token_id = TRANSIENT_ID_CEILING - len(transient)
+                transient[token_id] = token
+            token_ids.append(token_id)
+            counts.append(count)
+        return token_ids, counts, transient
+
+    def extend(self, tokens):
+        ids = self._ids
+        return [token_id if (token_id := ids.get(token)) is not None else self._add(token) for token in tokens]
+
+    def tokens(self, token_ids, transient=None):
+        tokens = self._tokens
+        if transient:
+            return [transient[token_id] if token_id in transient else tokens[token_id] for token_id in token_ids]
+        return [tokens[token_id] for token_id in token_ids]
+
+    def nbytes(self):
+        return (sys.getsizeof(self._ids) + sys.getsizeof(self._tokens)
+                + sum(sys.getsizeof(token) for token in self._tokens))
+
+
+vocabulary = TokenVocabulary()
+
+
+def _reset_after_fork():
+    vocabulary._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)